@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 22 19:03:44 2026
+
+@author: RTB
+"""
+
+import io
+import heapq
+import queue
+import threading
+import wave
+from time import perf_counter
+from collections import deque
+
+import numpy as np
+
+from base.eventlog import eventlog
+
+try:
+    import winsound
+except ImportError: #not on Windows
+    winsound = None
+
+#a WAV file decoded into memory. data is the complete file, as winsound plays
+#it. name is used in messages
+class Sound():
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+        with wave.open(io.BytesIO(data)) as wav:
+            self.params = wav.getparams()
+            self.frames = wav.readframes(self.params.nframes)
+        self.duration = self.params.nframes / self.params.framerate
+
+    @classmethod
+    def from_file(cls, filename):
+        with open(filename, 'rb') as file:
+            return cls(filename, file.read())
+
+    #sine of frequency (Hz) for duration (s) with a peak of gain (dBFS) as 
+    #16 bit mono, faded out linearly over the last FADE_OUT seconds to
+    #prevent a click. This matches the audiocheck files within rounding
+    FADE_OUT = 0.01
+    @classmethod
+    def from_tone(cls, frequency, duration, gain, framerate=44100):
+        t = np.arange(round(duration*framerate) + 1) / framerate
+        amplitude = 32767 * 10**(gain/20)
+        samples = amplitude * np.sin(2*np.pi*frequency*t)
+        fade = min(round(cls.FADE_OUT*framerate), len(samples))
+        samples[len(samples)-fade:] *= np.linspace(1, 0, fade)
+        samples = np.round(samples)
+        data = io.BytesIO()
+        with wave.open(data, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(framerate)
+            wav.writeframes(samples.astype('<i2').tobytes())
+        return cls(f'{frequency} Hz {duration} s {gain} dBFS', 
+                   data.getvalue())
+
+#Sinks play a Sound. play may block for the duration of the sound, stop ends
+#the sound being played and may be called from any thread.
+
+#winsound cannot play from memory asynchronously: play blocks the audio
+#worker, stop (PlaySound with None) makes it return early
+class WinsoundSink():
+    def play(self, sound):
+        winsound.PlaySound(sound.data, winsound.SND_MEMORY |
+                                       winsound.SND_NODEFAULT)
+
+    def stop(self):
+        winsound.PlaySound(None, 0)
+
+    def close(self):
+        pass
+
+#keeps (time, name) of every sound played, for tests and headless runs
+class NullSink():
+    MAXLEN = 1000
+
+    def __init__(self):
+        self.played = []
+
+    def play(self, sound):
+        self.played.append((perf_counter(), sound.name))
+        del self.played[:-self.MAXLEN]
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+#writes everything played into one WAV file, with silence between sounds, so
+#the timing of beeps and patterns can be inspected. Sounds must share the
+#format of the first sound played
+class FileSink():
+    def __init__(self, filename):
+        self.filename = filename
+        self.wav = None
+        self.start = None
+        self.written = 0 #frames
+
+    def play(self, sound):
+        now = perf_counter()
+        if self.wav is None:
+            self.wav = wave.open(self.filename, 'wb')
+            self.wav.setparams(sound.params)
+            self.start = now
+        params = self.wav.getparams()
+        if sound.params[:3] != params[:3]:
+            print(f'FileSink: {sound.name} does not match the format '
+                  f'of {self.filename}')
+            return
+        frame = params.nchannels * params.sampwidth
+        silence = round((now - self.start) * params.framerate) - self.written
+        if silence > 0:
+            self.wav.writeframes(bytes(silence * frame))
+            self.written += silence
+        self.wav.writeframes(sound.frames)
+        self.written += len(sound.frames) // frame
+
+    def stop(self):
+        pass
+
+    def close(self):
+        if self.wav is not None:
+            self.wav.close()
+
+#sink by name: 'winsound', 'null', 'file' or 'auto' for winsound if available
+def get_sink(name, filename=None):
+    if name == 'auto':
+        name = 'null' if winsound is None else 'winsound'
+    if name == 'winsound':
+        return WinsoundSink()
+    if name == 'file':
+        return FileSink(filename)
+    return NullSink()
+
+#Plays preloaded sounds on a single persistent worker thread.
+#A sound is identified by a key: a filename, or a tuple of (frequency,
+#duration, gain) for a synthesised tone. Sounds are cached per key.
+#The beep per volume step and the notification are created at startup, as
+#tones if config.tone_synthesis is set, else from the configured files: a
+#beep never reads from disk.
+#beep and multi_beep only put a command on the queue. Tones of a multi beep
+#are scheduled at absolute times, the worker sleeps until the next tone is
+#due. A beep interrupts a sound that is still playing and goes before
+#scheduled tones.
+#The time from the beep decision (or scheduled start of a tone) to handing
+#the sound to the sink is kept per beep, see get_report. If latency is given
+#it is also recorded as 'beep_to_output' and 'tone_to_output'.
+class AudioEngine():
+    REPORT_LEN = 100 #beeps kept for get_report
+
+    def __init__(self, config, sink=None, latency=None):
+        if sink is None:
+            sink = get_sink(config.audio_sink, config.audio_file)
+        self.sink = sink
+        self.latency = latency
+        self.log_timing = config.log_beep_timing
+        self.report = deque(maxlen=self.REPORT_LEN)
+
+        self.sounds = {}
+        if config.tone_synthesis:
+            tone = config.beep_tone
+            self.beep_sounds = {volume: (tone['frequency'], tone['duration'],
+                                         gain)
+                                for volume, gain in config.volume_gain.items()}
+            tone = config.notification_tone
+            self.notification_sound = (tone['frequency'], tone['duration'],
+                                       tone['gain'])
+        else:
+            self.beep_sounds = dict(config.sound_files)
+            self.notification_sound = config.notification_file
+        for key in [*self.beep_sounds.values(), self.notification_sound]:
+            self.get_sound(key)
+        self.notification_duration = config.notification_file_duration
+        if (sound := self.sounds[self.notification_sound]) is not None:
+            self.notification_duration = sound.duration
+
+        self.queue = queue.Queue()
+        self.playing = False
+        self.thread = threading.Thread(target=self.run, name='audio',
+                                       daemon=True)
+        self.thread.start()
+
+    #returns None if the file cannot be loaded
+    def get_sound(self, key):
+        if key not in self.sounds:
+            try:
+                if isinstance(key, tuple):
+                    self.sounds[key] = Sound.from_tone(*key)
+                else:
+                    self.sounds[key] = Sound.from_file(key)
+            except (OSError, EOFError, wave.Error) as e:
+                print(f'Sound failed to load: {key}: {e}')
+                self.sounds[key] = None
+        return self.sounds[key]
+
+    #decided is the perf_counter time of the beep decision, default now
+    def beep(self, key, decided=None):
+        if decided is None:
+            decided = perf_counter()
+        if self.playing:
+            self.sink.stop()
+        self.queue.put((decided, 0, key))
+
+    #the beep at a volume step of config.volume_gain or config.sound_files
+    def beep_volume(self, volume, decided=None):
+        self.beep(self.beep_sounds[volume], decided)
+
+    #count tones of duration seconds with delay seconds in between
+    def multi_beep(self, key, duration=0.1, count=2, delay=0.1):
+        now = perf_counter()
+        for number in range(count):
+            self.queue.put((now + number*(duration+delay), 1, key))
+
+    def notify(self, count, delay):
+        self.multi_beep(self.notification_sound, self.notification_duration,
+                        count, delay)
+
+    #time from decision to output per beep in ms: the most recent and stats
+    def get_report(self):
+        beeps = [ms for priority, ms in self.report if priority == 0]
+        if not beeps:
+            return 'No beeps played'
+        return (f'{len(beeps)} beeps, decision to output: last '
+                f'{beeps[-1]:.2f} ms, median {np.median(beeps):.2f} ms, '
+                f'max {max(beeps):.2f} ms')
+
+    def run(self):
+        #heap of (priority, start, sequence, filename): a beep before tones
+        scheduled = []
+        sequence = 0
+        while True:
+            timeout = None
+            if scheduled:
+                timeout = max(0, scheduled[0][1] - perf_counter())
+            try:
+                command = self.queue.get(timeout=timeout)
+                if command is None:
+                    break
+                start, priority, filename = command
+                heapq.heappush(scheduled, (priority, start, sequence,
+                                           filename))
+                sequence += 1
+                continue #take in every waiting command before playing
+            except queue.Empty:
+                pass
+
+            priority, start, _, key = heapq.heappop(scheduled)
+            if (sound := self.get_sound(key)) is None:
+                continue
+            self.playing = True
+            output = perf_counter()
+            try:
+                self.sink.play(sound)
+            except Exception as e:
+                eventlog.error('sound_error', 'Sound failed to play: {sound}: '
+                               '{error}', sound=sound.name, error=e)
+            self.playing = False
+            self.log_output(priority, sound, output - start)
+
+    #after the sound is played: off the path from decision to output
+    def log_output(self, priority, sound, seconds):
+        self.report.append((priority, seconds*1000))
+        if self.latency is not None:
+            stage = 'beep_to_output' if priority == 0 else 'tone_to_output'
+            self.latency.record(stage, seconds)
+        if self.log_timing:
+            eventlog.info('beep_timing', '{sound}: {ms:.2f} ms decision to '
+                          'output', sound=sound.name, ms=seconds*1000)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join(1)
+        self.sink.close()
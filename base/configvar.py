@@ -9,6 +9,7 @@ import statistics
 from collections import deque
 
 from utility import packets_to_ms, Variable
+from base.eventlog import eventlog
 
 #maintain a rolling array of the time between beep and actual shift
 #caps to the lower and upper limits of the tone_offset variable to avoid
@@ -47,12 +48,16 @@ class DynamicToneOffset():
             return
         
         if self.counter < 0:
-            print(f'DynamicToneOffset: erronous {packets_to_ms(self.counter)} ms, discarded')
+            eventlog.info('tone_offset_discarded', 
+                          'DynamicToneOffset: erronous {ms} ms, discarded',
+                          ms=packets_to_ms(self.counter))
             self.reset_counter()
             return
             
         if self.counter > self.offset_outlier:
-            print(f'DynamicToneOffset: outlier {packets_to_ms(self.counter)} ms, discarded')
+            eventlog.info('tone_offset_discarded', 
+                          'DynamicToneOffset: outlier {ms} ms, discarded',
+                          ms=packets_to_ms(self.counter))
             self.reset_counter()
             return
 
@@ -66,7 +71,9 @@ class DynamicToneOffset():
 
         self.deque.append(value)
         average = statistics.mean(self.deque)
-        print(f'DynamicToneOffset: offset {self.offset:.1f} new average {average:.2f}')
+        eventlog.info('tone_offset', 
+            'DynamicToneOffset: offset {offset:.1f} new average {average:.2f}',
+            offset=self.offset, average=average)
         average = round(average, 1)
         if average != self.offset:
             self.offset = average
@@ -106,6 +113,8 @@ class RevlimitPercent(Variable):
         super().__init__(defaultvalue=config.revlimit_percent)
 
 class HysteresisPercent(Variable):
+    FDP_FIELDS = ['engine_max_rpm']
+
     def __init__(self, config):
         super().__init__(defaultvalue=config.hysteresis_percent)
 
@@ -114,6 +123,8 @@ class HysteresisPercent(Variable):
 
 #TODO: Test if this makes any sense
 class IncludeReplay(Variable):
+    FDP_FIELDS = ['is_race_on']
+
     def __init__(self, config):
         super().__init__(defaultvalue=config.includereplay)
         
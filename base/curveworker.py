@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:02:19 2026
+
+@author: RTB
+"""
+
+from concurrent.futures.thread import ThreadPoolExecutor
+
+#Runs curve computations and curve file I/O off the packet thread.
+#A single worker thread: jobs finish in the order they are submitted.
+#The job must not change state shared with the packet thread, it returns a
+#result instead. The packet thread polls for the result and applies it in
+#one go, so the curve, revlimit and shift rpms change together.
+#reset drops the pending job: its result is discarded when it finishes.
+class CurveWorker():
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1,
+                                           thread_name_prefix='curve')
+        self.future = None
+
+    def submit(self, func, *args, **kwargs):
+        self.future = self.executor.submit(func, *args, **kwargs)
+
+    def is_pending(self):
+        return self.future is not None
+
+    #returns the result of the finished job, or None if there is none (yet)
+    #an exception raised by the job is raised here
+    def poll(self):
+        if self.future is None or not self.future.done():
+            return None
+        future, self.future = self.future, None
+        return future.result()
+
+    #block until the pending job is finished, used for headless replays
+    def wait(self, timeout=None):
+        if self.future is not None:
+            self.future.exception(timeout)
+
+    def reset(self):
+        self.future = None
+
+    def close(self):
+        self.executor.shutdown(wait=False)
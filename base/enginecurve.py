@@ -13,6 +13,7 @@ from os import makedirs
 makedirs('curves/', exist_ok=True) #create curves folder if not exists
 
 from utility import np_drag_fit, simplify_curve, round_to
+from base.eventlog import eventlog
 
 #poorly named: does not extend Curve
 #Given an array of consecutive rpm/accel points at full throttle and an array
@@ -34,6 +35,7 @@ class EngineCurve():
     FILENAME = lambda _, gtdp: f'{EngineCurve.FOLDER}/{gtdp.car_ordinal}.tsv'
     ROUND = 100 #round the saved curve to multiples of round
     ROUND_REVLIMIT = 50 #covers 99.9% of all standard revlimits
+    FDP_FIELDS = ['car_ordinal']
     
     #code duplication, but calling reset in __init__ causes issues with
     #inheritance
@@ -48,6 +50,12 @@ class EngineCurve():
     def is_loaded(self):
         return self.curve_state == True
 
+    #take over the curve of another EngineCurve, such as one computed on the
+    #curve worker
+    def copy_from(self, curve):
+        for var in ['curve_state', 'rpm', 'power', 'torque', 'revlimit']:
+            setattr(self, var, getattr(curve, var))
+
     #called once to update curve
     def update(self, gtdp, *args, **kwargs):
         if self.curve_state:
@@ -57,26 +65,36 @@ class EngineCurve():
         if exists(filename): #file exists
             self.load(filename)
             self.curve_state = True
-            print(f'Loaded curve from {filename}')
+            eventlog.info('curve_loaded', 'Loaded curve from {filename}',
+                          filename=filename)
         elif len(kwargs) > 0:
             self.curve_state = True
             # self.init_from_drag_fit(*args, **kwargs)
             self.init_from_run(*args, **kwargs)
-            self.save(filename)
-            print(f'Saved curve to {filename}')
+            try:
+                self.save(filename)
+            except OSError as e: #the curve is still used for this session
+                eventlog.warning('curve_save_error', 
+                                 'Failed to save curve to {filename}: {error}',
+                                 filename=filename, error=e)
+            else:
+                eventlog.info('curve_saved', 'Saved curve to {filename}',
+                              filename=filename)
         else:
             self.curve_state = False
-            print("No curve loaded, waiting for DataCollector")
+            eventlog.info('curve_missing', 
+                          'No curve loaded, waiting for DataCollector')
 
     # def init_from_file(self, filename, *args, **kwargs):
     #     self.load(filename)
     
     #TODO: get revlimit from runcollector
+    #run is a structured array with a column per packet property
     def init_from_run(self, run, *args, **kwargs):
         
-        rpm = np.array([p.current_engine_rpm for p in run])
-        power = np.array([p.power for p in run]) / 1000 #W -> kW
-        torque = np.array([p.torque for p in run])
+        rpm = run['current_engine_rpm'].astype(np.float64)
+        power = run['power'].astype(np.float64) / 1000 #W -> kW
+        torque = run['torque'].astype(np.float64)
         
         #round revlimit to nearest 50 (default)
         self.revlimit = round_to(max(rpm), 50)
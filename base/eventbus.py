@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 15:08:21 2026
+
+@author: RTB
+"""
+
+#Synchronous publish/subscribe by event name. emit calls every subscriber of
+#the event on the emitting thread, in order of subscription, with the values
+#as keyword arguments. Events of ForzaBeep:
+#curve_pending   a curve job was submitted to the curve worker
+#curve_loaded    a curve was applied: version, shiftrpms (relratio: rpm)
+#curve_discarded a curve job finished without a curve
+#curve_reset     the curve was reset: version
+#gear_locked     the ratio of a gear locked: gear
+class EventBus():
+    def __init__(self):
+        self.subscribers = {} #event: list of functions
+
+    def subscribe(self, event, func):
+        self.subscribers.setdefault(event, []).append(func)
+
+    def emit(self, event, **values):
+        for func in self.subscribers.get(event, []):
+            func(**values)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 18:25:37 2026
+
+@author: RTB
+"""
+
+import sys
+import json
+import atexit
+import threading
+from time import time, perf_counter, sleep
+from collections import deque
+
+from config import config
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {'DEBUG': DEBUG, 'INFO': INFO, 'WARNING': WARNING, 'ERROR': ERROR}
+LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+#Structured event log for the packet thread. Logging an event appends a tuple
+#to a deque and returns: no formatting, no I/O and no lock. A writer thread
+#drains the deque every INTERVAL seconds, formats the message and writes it
+#to the console and, if filename is given, a JSONL file with a line per event
+#   {"time", "level", "event", "message", **fields}
+#message is a format string for the fields, such as 'offset {offset:.1f}'.
+#Events below level are discarded at the call. Each event type is limited to
+#rate_limit events per second, the rest is dropped and the number dropped is
+#added to the next event of that type as the field 'suppressed'.
+#If the deque is full, the oldest events are dropped.
+class EventLog():
+    INTERVAL = 0.05 #s
+    MAXLEN = 10000
+
+    def __init__(self, level=INFO, console=True, filename=None,
+                 rate_limit=None):
+        self.level = level
+        self.console = console
+        self.rate_limit = rate_limit
+        self.events = deque(maxlen=self.MAXLEN)
+        self.windows = {} #event: [start of window, count, suppressed]
+
+        self.file = None
+        if filename is not None:
+            self.file = open(filename, 'a', encoding='utf-8')
+
+        self.lock = threading.Lock() #writer thread and flush only
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='eventlog',
+                                       daemon=True)
+        self.thread.start()
+
+    def log(self, level, event, message='', **fields):
+        if level < self.level:
+            return
+        if self.rate_limit is not None:
+            now = perf_counter()
+            window = self.windows.get(event)
+            if window is None or now - window[0] >= 1:
+                suppressed = 0 if window is None else window[2]
+                window = self.windows[event] = [now, 0, 0]
+                if suppressed:
+                    fields['suppressed'] = suppressed
+            if window[1] >= self.rate_limit:
+                window[2] += 1
+                return
+            window[1] += 1
+        self.events.append((time(), level, event, message, fields))
+
+    def debug(self, event, message='', **fields):
+        self.log(DEBUG, event, message, **fields)
+
+    def info(self, event, message='', **fields):
+        self.log(INFO, event, message, **fields)
+
+    def warning(self, event, message='', **fields):
+        self.log(WARNING, event, message, **fields)
+
+    def error(self, event, message='', **fields):
+        self.log(ERROR, event, message, **fields)
+
+    def is_enabled(self, level):
+        return level >= self.level
+
+    def run(self):
+        while self.running:
+            sleep(self.INTERVAL)
+            self.flush()
+
+    #write all pending events, called by the writer thread and on close
+    def flush(self):
+        with self.lock:
+            while True:
+                try:
+                    timestamp, level, event, message, fields = (
+                        self.events.popleft())
+                except IndexError:
+                    break
+                self.write(timestamp, level, event, message, fields)
+            if self.file is not None:
+                self.file.flush()
+
+    def write(self, timestamp, level, event, message, fields):
+        try:
+            text = message.format(**fields)
+        except (KeyError, IndexError, ValueError) as e:
+            text = f'{message} {fields} ({e!r})'
+        if self.console:
+            line = text
+            if level >= WARNING:
+                line = f'{LEVEL_NAMES[level]}: {line}'
+            if 'suppressed' in fields:
+                line = f"{line} ({fields['suppressed']} similar suppressed)"
+            print(line, file=sys.stdout)
+        if self.file is not None:
+            record = {'time': timestamp, 'level': LEVEL_NAMES[level],
+                      'event': event, 'message': text, **fields}
+            self.file.write(json.dumps(record, default=str) + '\n')
+
+    def close(self):
+        self.running = False
+        self.thread.join(1)
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+#the event log of this process, pending events are written at exit
+eventlog = EventLog(LEVELS[config.log_level], config.log_console,
+                    config.log_file, config.log_rate_limit)
+atexit.register(eventlog.close)
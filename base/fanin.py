@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:41:26 2026
+
+@author: RTB
+"""
+
+import socket
+import selectors
+import threading
+from queue import Queue, Full, Empty
+from time import perf_counter
+
+from base.eventlog import eventlog
+
+#Several rigs sending Data Out to one machine. One receiver thread
+#demultiplexes datagrams into sessions: by source address if a single port is
+#used, or by local port if config.fanin_ports lists several ports.
+#Every session is an independent headless ForzaBeep (own gears, lookahead,
+#curve and curve worker) fed by its own worker thread through a queue. A
+#slow session only fills its own queue: other sessions keep receiving.
+#If a queue is full the packet is dropped and counted for that session.
+
+#a headless pipeline with its own worker thread
+#A session that fails on MAX_ERRORS packets in a row is stopped: further
+#packets are dropped. Only the first error of a streak is logged.
+class FanInSession():
+    MAX_ERRORS = 100
+
+    def __init__(self, key, forzabeep, maxlen):
+        self.key = key
+        self.forzabeep = forzabeep
+        self.queue = Queue(maxsize=maxlen)
+        self.dropped = 0
+        self.packets = 0
+        self.last_recv_time = None
+        self.errors = 0 #packets in a row that raised
+        self.failed = False
+        self.thread = threading.Thread(target=self.run, daemon=True,
+                                       name=f'session {key}')
+        self.thread.start()
+
+    #called by the receiver thread, data must not be a reused buffer
+    def put(self, data, recv_time):
+        self.last_recv_time = recv_time
+        if self.failed:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait((data, recv_time))
+        except Full:
+            self.dropped += 1
+
+    def run(self):
+        loop = self.forzabeep.loop
+        latency = self.forzabeep.latency
+        while (item := self.queue.get()) is not None:
+            data, recv_time = item
+            if latency is not None:
+                latency.set_recv_time(recv_time)
+            try:
+                fdp = loop.decode(data)
+                loop.packet_stats.update(fdp.timestamp_ms, recv_time)
+                self.packets += 1
+                self.forzabeep.loop_func(fdp)
+                self.errors = 0
+            except Exception as e:
+                self.errors += 1
+                if self.errors == 1:
+                    eventlog.error('session_error', 'session {key}: {error}',
+                                   key=self.key, error=e)
+                if self.errors >= self.MAX_ERRORS:
+                    self.failed = True
+                    eventlog.error('session_failed', 'session {key} stopped '
+                                   'after {count} errors in a row', 
+                                   key=self.key, count=self.errors)
+                    break
+
+    def close(self):
+        #make room for the stop marker: pending packets are not needed
+        while True:
+            try:
+                self.queue.put_nowait(None)
+                break
+            except Full:
+                try:
+                    self.queue.get_nowait()
+                except Empty:
+                    pass
+        self.thread.join(timeout=1)
+        self.forzabeep.close(writeback=False)
+
+class ForzaFanIn():
+    BUFFER_SIZE = 1024
+    TIMEOUT = 1 #seconds, for checking isRunning
+
+    #forzabeep_factory returns a new headless ForzaBeep per session
+    def __init__(self, config, forzabeep_factory):
+        self.ip = ''
+        self.ports = config.fanin_ports or [config.port]
+        self.by_port = config.fanin_ports is not None
+        self.max_sessions = config.fanin_max_sessions
+        self.queue_len = config.fanin_queue_len
+        self.receive_buffer = config.udp_receive_buffer
+        self.forzabeep_factory = forzabeep_factory
+
+        self.sessions = {} #source address or local port: FanInSession
+        self.rejected = 0 #packets from sources beyond max_sessions
+        self.isRunning = False
+        self.thread = None
+        self.buffer = bytearray(self.BUFFER_SIZE)
+
+    def open_socket(self, port):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.receive_buffer is not None:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 
+                         self.receive_buffer)
+        s.bind((self.ip, port))
+        s.setblocking(False)
+        return s
+
+    def get_session(self, key):
+        if (session := self.sessions.get(key)) is not None:
+            return session
+        if len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            return None
+        eventlog.info('new_session', 'New session {key}', key=key)
+        session = FanInSession(key, self.forzabeep_factory(), self.queue_len)
+        self.sessions[key] = session
+        return session
+
+    #drain every ready socket, each datagram is copied once to be queued
+    def receive(self, s, port):
+        recv_time = perf_counter()
+        try:
+            while True:
+                nbytes, address = s.recvfrom_into(self.buffer)
+                key = port if self.by_port else address
+                if (session := self.get_session(key)) is not None:
+                    session.put(bytes(self.buffer[:nbytes]), recv_time)
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def run(self):
+        sockets = []
+        try:
+            with selectors.DefaultSelector() as selector:
+                for port in self.ports:
+                    sockets.append(s := self.open_socket(port))
+                    selector.register(s, selectors.EVENT_READ, port)
+                while self.isRunning:
+                    for key, _ in selector.select(self.TIMEOUT):
+                        self.receive(key.fileobj, key.data)
+        except BaseException as e:
+            eventlog.error('fanin', '{error}', error=e)
+        finally:
+            for s in sockets:
+                s.close()
+
+    def start(self):
+        self.isRunning = True
+        self.thread = threading.Thread(target=self.run, name='fanin')
+        self.thread.start()
+
+    def close(self):
+        self.isRunning = False
+        if self.thread is not None:
+            self.thread.join()
+        for session in self.sessions.values():
+            session.close()
+
+    def get_status(self):
+        now = perf_counter()
+        lines = []
+        for key, session in self.sessions.items():
+            stats = session.forzabeep.loop.packet_stats
+            lines.append(f'{key}: {session.packets} packets, '
+                         f'{session.dropped} dropped in queue, '
+                         f'{stats.get_text(now)}'.replace('\n', ', ') +
+                         (', stopped after errors' if session.failed else ''))
+        return '\n'.join(lines)
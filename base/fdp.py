@@ -24,7 +24,9 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 '''
 
-from struct import unpack, pack, calcsize
+import re
+from struct import unpack, pack, calcsize, Struct
+from collections import namedtuple
 
 ## Documentation of the packet format is available on
 #https://support.forzamotorsport.net/hc/en-us/articles/21742934024211-Forza-Motorsport-Data-Out-Documentation
@@ -235,4 +237,116 @@ class ForzaDataPacket:
             return('{0.is_race_on}\t{0.timestamp_ms}\t{0.engine_max_rpm:f}\t{0.engine_idle_rpm:f}\t{0.current_engine_rpm:f}\t{0.acceleration_x:f}\t{0.acceleration_y:f}\t{0.acceleration_z:f}\t{0.velocity_x:f}\t{0.velocity_y:f}\t{0.velocity_z:f}\t{0.angular_velocity_x:f}\t{0.angular_velocity_y:f}\t{0.angular_velocity_z:f}\t{0.yaw:f}\t{0.pitch:f}\t{0.roll:f}\t{0.norm_suspension_travel_FL:f}\t{0.norm_suspension_travel_FR:f}\t{0.norm_suspension_travel_RL:f}\t{0.norm_suspension_travel_RR:f}\t{0.tire_slip_ratio_FL:f}\t{0.tire_slip_ratio_FR:f}\t{0.tire_slip_ratio_RL:f}\t{0.tire_slip_ratio_RR:f}\t{0.wheel_rotation_speed_FL:f}\t{0.wheel_rotation_speed_FR:f}\t{0.wheel_rotation_speed_RL:f}\t{0.wheel_rotation_speed_RR:f}\t{0.wheel_on_rumble_strip_FL:f}\t{0.wheel_on_rumble_strip_FR:f}\t{0.wheel_on_rumble_strip_RL:f}\t{0.wheel_on_rumble_strip_RR:f}\t{0.wheel_in_puddle_FL:f}\t{0.wheel_in_puddle_FR:f}\t{0.wheel_in_puddle_RL:f}\t{0.wheel_in_puddle_RR:f}\t{0.surface_rumble_FL:f}\t{0.surface_rumble_FR:f}\t{0.surface_rumble_RL:f}\t{0.surface_rumble_RR:f}\t{0.tire_slip_angle_FL:f}\t{0.tire_slip_angle_FR:f}\t{0.tire_slip_angle_RL:f}\t{0.tire_slip_angle_RR:f}\t{0.tire_combined_slip_FL:f}\t{0.tire_combined_slip_FR:f}\t{0.tire_combined_slip_RL:f}\t{0.tire_combined_slip_RR:f}\t{0.suspension_travel_meters_FL:f}\t{0.suspension_travel_meters_FR:f}\t{0.suspension_travel_meters_RL:f}\t{0.suspension_travel_meters_RR:f}\t{0.car_ordinal}\t{0.car_class}\t{0.car_performance_index}\t{0.drivetrain_type}\t{0.num_cylinders}'.format(self))
 
         return('{0.is_race_on}\t{0.timestamp_ms}\t{0.engine_max_rpm:f}\t{0.engine_idle_rpm:f}\t{0.current_engine_rpm:f}\t{0.acceleration_x:f}\t{0.acceleration_y:f}\t{0.acceleration_z:f}\t{0.velocity_x:f}\t{0.velocity_y:f}\t{0.velocity_z:f}\t{0.angular_velocity_x:f}\t{0.angular_velocity_y:f}\t{0.angular_velocity_z:f}\t{0.yaw:f}\t{0.pitch:f}\t{0.roll:f}\t{0.norm_suspension_travel_FL:f}\t{0.norm_suspension_travel_FR:f}\t{0.norm_suspension_travel_RL:f}\t{0.norm_suspension_travel_RR:f}\t{0.tire_slip_ratio_FL:f}\t{0.tire_slip_ratio_FR:f}\t{0.tire_slip_ratio_RL:f}\t{0.tire_slip_ratio_RR:f}\t{0.wheel_rotation_speed_FL:f}\t{0.wheel_rotation_speed_FR:f}\t{0.wheel_rotation_speed_RL:f}\t{0.wheel_rotation_speed_RR:f}\t{0.wheel_on_rumble_strip_FL:f}\t{0.wheel_on_rumble_strip_FR:f}\t{0.wheel_on_rumble_strip_RL:f}\t{0.wheel_on_rumble_strip_RR:f}\t{0.wheel_in_puddle_FL:f}\t{0.wheel_in_puddle_FR:f}\t{0.wheel_in_puddle_RL:f}\t{0.wheel_in_puddle_RR:f}\t{0.surface_rumble_FL:f}\t{0.surface_rumble_FR:f}\t{0.surface_rumble_RL:f}\t{0.surface_rumble_RR:f}\t{0.tire_slip_angle_FL:f}\t{0.tire_slip_angle_FR:f}\t{0.tire_slip_angle_RL:f}\t{0.tire_slip_angle_RR:f}\t{0.tire_combined_slip_FL:f}\t{0.tire_combined_slip_FR:f}\t{0.tire_combined_slip_RL:f}\t{0.tire_combined_slip_RR:f}\t{0.suspension_travel_meters_FL:f}\t{0.suspension_travel_meters_FR:f}\t{0.suspension_travel_meters_RL:f}\t{0.suspension_travel_meters_RR:f}\t{0.car_ordinal}\t{0.car_class}\t{0.car_performance_index}\t{0.drivetrain_type}\t{0.num_cylinders}\t{0.position_x}\t{0.position_y}\t{0.position_z}\t{0.speed}\t{0.power}\t{0.torque}\t{0.tire_temp_FL}\t{0.tire_temp_FR}\t{0.tire_temp_RL}\t{0.tire_temp_RR}\t{0.boost}\t{0.fuel}\t{0.dist_traveled}\t{0.best_lap_time}\t{0.last_lap_time}\t{0.cur_lap_time}\t{0.cur_race_time}\t{0.lap_no}\t{0.race_pos}\t{0.accel}\t{0.brake}\t{0.clutch}\t{0.handbrake}\t{0.gear}\t{0.steer}\t{0.norm_driving_line}\t{0.norm_ai_brake_diff}'.format(self))
-    
\ No newline at end of file
+
+#Compact alternative to ForzaDataPacket: a namedtuple with the same property
+#names and helper functions. Immutable, no __dict__ per packet.
+#A projected record only holds the properties it was decoded with.
+class ForzaDataRecord(tuple):
+    __slots__ = ()
+    packet_format = None
+    props = []
+
+    @classmethod
+    def get_props(cls, packet_format=None):
+        return cls.props
+
+    def to_list(self, attributes):
+        if attributes:
+            return([getattr(self, a) for a in attributes])
+        return list(self)
+
+    def get_format(self):
+        return(self.packet_format)
+
+#Decoder built on a precompiled struct.Struct per packet format. A packet is
+#unpacked with a single unpack_from call straight from the received buffer:
+#fh4/fh5 skip the 12 unknown bytes after the sled section with pad bytes
+#instead of slicing and concatenating, fm8 ignores its trailing bytes.
+#The result is a ForzaDataRecord subclass per packet format.
+#if packet_format is None, the format is derived from the packet size
+#if fields is given, only those properties are decoded: all other properties
+#are turned into pad bytes in the Struct. Fields the packet format does not
+#contain are ignored.
+class ForzaDataPacketDecoder():
+    _dash_tail = ForzaDataPacket.dash_format[
+                                        len(ForzaDataPacket.sled_format):]
+    decode_formats = {
+        'sled': ForzaDataPacket.sled_format,
+        'dash': ForzaDataPacket.dash_format,
+        'fh4':  ForzaDataPacket.sled_format + '12x' + _dash_tail,
+        'fh5':  ForzaDataPacket.sled_format + '12x' + _dash_tail,
+        'fm8':  ForzaDataPacket.dash_format }
+
+    def __init__(self, packet_format=None, fields=None):
+        self.packet_format = packet_format
+        self.fields = None if fields is None else set(fields)
+        self.decoders = {} #packet_format: (Struct, record constructor)
+
+    #split a format string into a list of single characters, one per value
+    #pad bytes are kept as a single 'Nx' entry
+    @staticmethod
+    def split_format(fmt):
+        chars = []
+        for count, char in re.findall(r'(\d*)([a-zA-Z])', fmt[1:]):
+            if char == 'x':
+                chars.append(f'{count}x')
+            else:
+                chars.extend([char]*int(count or 1))
+        return chars
+
+    #replace every property not in fields with pad bytes of the same size
+    #returns the format string and the properties it decodes, in order
+    def get_projection(self, packet_format):
+        fmt = self.decode_formats[packet_format]
+        props = ForzaDataPacket.get_props(packet_format)
+        if self.fields is None:
+            return fmt, props
+
+        chars, kept, pad = [fmt[0]], [], 0
+        values = iter(props)
+        for char in self.split_format(fmt):
+            if char[-1] != 'x' and (prop := next(values)) in self.fields:
+                if pad:
+                    chars.append(f'{pad}x')
+                    pad = 0
+                chars.append(char)
+                kept.append(prop)
+            else:
+                pad += calcsize(f'<{char}')
+        return ''.join(chars), kept
+
+    #create the Struct and record class once per packet format
+    def build(self, packet_format):
+        fmt, props = self.get_projection(packet_format)
+        fields = namedtuple(f'ForzaData_{packet_format}', props)
+        record_class = type(f'ForzaDataRecord_{packet_format}',
+                            (fields, ForzaDataRecord),
+                            {'__slots__': (), 'packet_format': packet_format,
+                             'props': props})
+        decoder = (Struct(fmt), record_class._make)
+        self.decoders[packet_format] = decoder
+        return decoder
+
+    def get_packet_format(self, data):
+        return self.get_packet_format_of_size(len(data))
+
+    def get_packet_format_of_size(self, nbytes):
+        if self.packet_format is not None:
+            return self.packet_format
+        return ForzaDataPacket.lookup_format.get(nbytes, 'dash')
+
+    #returns a function decoding a packet of nbytes bytes from a buffer,
+    #for callers that detect the packet format once instead of per packet
+    def get_decode_func(self, nbytes):
+        packet_format = self.get_packet_format_of_size(nbytes)
+        if (decoder := self.decoders.get(packet_format)) is None:
+            decoder = self.build(packet_format)
+        unpack_from, make = decoder[0].unpack_from, decoder[1]
+        return lambda buffer: make(unpack_from(buffer))
+
+    def decode(self, data, offset=0):
+        packet_format = self.get_packet_format(data)
+        if (decoder := self.decoders.get(packet_format)) is None:
+            decoder = self.build(packet_format)
+        struct, make = decoder
+        return make(struct.unpack_from(data, offset))
@@ -6,13 +6,46 @@ Created on Wed Aug  2 20:59:57 2023
 """
 
 import socket
+import asyncio
+from time import perf_counter
 from concurrent.futures.thread import ThreadPoolExecutor
 
-from base.fdp import ForzaDataPacket
+from base.fdp import ForzaDataPacket, ForzaDataPacketDecoder
+from base.telemetrylog import TelemetryRecorder
+from base.packetstats import PacketStats
+from base.relay import UDPRelay
+from base.eventlog import eventlog
 
-#consider limiting the recvfrom size to the correct packet size
+#asyncio protocol that hands every wakeup to ForzaUDPLoop.receive_batch
+#the transport delivers one datagram per wakeup: receive_batch drains the 
+#socket of any datagrams that arrived since
+class ForzaDatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, udploop, sock):
+        self.udploop = udploop
+        self.sock = sock
+
+    def datagram_received(self, data, addr):
+        self.udploop.receive_batch(data, self.sock)
+
+    def error_received(self, exc):
+        eventlog.warning('udp_error', 'error_received {error}', error=exc)
+
+#Packets are received into a single preallocated buffer and decoded from a
+#view on it: decoding copies the values out, so the buffer is free again for
+#the next packet. The packet size, and with it the format, is detected when
+#the first packet of a session arrives and again if the size changes.
+#The loop runs on a thread: either blocking on recvfrom (default) or an
+#asyncio event loop if config.asyncio_udp_loop is set.
+#State changes (Started, Receiving, Timeout, Stopped) are sent to listeners
 class ForzaUDPLoop():
-    def __init__(self, config, loop_func):
+    TIMEOUT = 1 #seconds without packets for state Timeout
+    BUFFER_SIZE = 1024 #larger than any packet format
+    #packet properties read by the loop itself for PacketStats
+    FDP_FIELDS = ['timestamp_ms']
+
+    #fields limits decoding to the given packet properties if not None
+    #latency is an optional LatencyProbes: sets receive time, times decode
+    def __init__(self, config, loop_func, fields=None, latency=None):
     # def __init__(self, ip, port, packet_format, loop_func):
         self.threadPool = ThreadPoolExecutor(max_workers=8,
                                              thread_name_prefix="exec")
@@ -22,29 +55,113 @@ class ForzaUDPLoop():
         self.port = config.port
         self.packet_format = config.packet_format
         self.loop_func = loop_func
+        self.latency = latency
+        self.telemetry_log = config.telemetry_log
+        self.recorder = None
+
+        self.asyncio_udp_loop = config.asyncio_udp_loop
+        self.stop_async = None #set while the asyncio loop runs
+        self.received = False #packet received since last timeout check
+        self.packets = 0
+        self.coalesced = 0 #packets without beep decision, newer one pending
+
+        self.state = 'Stopped'
+        self.listeners = []
+
+        self.receive_buffer = config.udp_receive_buffer
+        #relay is done after loop_func: it does not delay the beep
+        self.relay = None
+        if config.relay_destinations:
+            self.relay = UDPRelay(config.relay_destinations, self.port)
+        self.buffer = bytearray(self.BUFFER_SIZE)
+        self.buffer_view = memoryview(self.buffer)
+        self.session_size = None
+        self.session_view = None #view of the buffer of size session_size
+        self.session_decode = None
+        self.packet_stats = PacketStats()
+
+        self.decoder = None
+        if config.fast_packet_decoder:
+            if fields is not None:
+                fields = set(fields).union(self.FDP_FIELDS)
+            self.decoder = ForzaDataPacketDecoder(self.packet_format, fields)
 
     def firststart(self):
         if self.port != '':
             self.toggle(True)
 
+    #listener is called with the new state on every change of state
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def set_state(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        for listener in self.listeners:
+            listener(state)
+
     def toggle(self, toggle=None):
         if toggle and not self.isRunning:
+            self.set_state('Started')
             def starting():
                 self.isRunning = True
-                self.fdp_loop(self.loop_func)
+                if self.asyncio_udp_loop:
+                    asyncio.run(self.fdp_loop_async(self.loop_func))
+                else:
+                    self.fdp_loop(self.loop_func)
             self.threadPool.submit(starting)
         else:
+            self.set_state('Stopped')
             def stopping():
                 self.isRunning = False
+                if self.stop_async is not None:
+                    self.stop_async()
             self.threadPool.submit(stopping)
         return self.isRunning
 
+    #sets the receive buffer size and resets the packet stats
+    def open_socket(self, s):
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.receive_buffer is not None:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 
+                         self.receive_buffer)
+        #the OS may clamp or (Linux) double the requested size
+        size = s.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        print(f'Receive buffer {size} bytes')
+        s.bind((self.ip, self.port))
+        self.packet_stats.reset()
+        self.session_size = None
+
+    #detect the packet format from the packet size, returns the view of the
+    #buffer that holds a packet of that size
+    def get_session_view(self, nbytes):
+        if nbytes != self.session_size:
+            self.session_size = nbytes
+            self.session_view = self.buffer_view[:nbytes]
+            if self.decoder is not None:
+                self.session_decode = self.decoder.get_decode_func(nbytes)
+            else:
+                self.session_decode = lambda data: ForzaDataPacket(
+                            bytes(data), packet_format=self.packet_format)
+        return self.session_view
+
+    #the recorder is opened and closed on the loop thread
+    def open_recorder(self):
+        if self.telemetry_log is not None:
+            self.recorder = TelemetryRecorder(self.telemetry_log)
+
+    def close_recorder(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
     def fdp_loop(self, loop_func=None):
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                s.settimeout(1)
-                s.bind((self.ip, self.port))
+                s.settimeout(self.TIMEOUT)
+                self.open_socket(s)
+                self.open_recorder()
                 while self.isRunning:
                     fdp = self.nextFdp(s)
                     if fdp is None:
@@ -52,8 +169,83 @@ class ForzaUDPLoop():
     
                     if loop_func is not None:
                         loop_func(fdp)
+                    if self.relay is not None:
+                        self.relay.send(self.session_view)
         except BaseException as e:
-            print(e)
+            eventlog.error('udp_loop', '{error}', error=e)
+        finally:
+            self.close_recorder()
+
+    #asyncio version of fdp_loop: wakes up on packets and a stop event
+    #instead of polling isRunning. Times out every TIMEOUT seconds only to
+    #update the state
+    async def fdp_loop_async(self, loop_func=None):
+        aioloop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        self.stop_async = lambda: aioloop.call_soon_threadsafe(stop.set)
+        self.loop_func = loop_func
+        transport = None
+        try:
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.open_socket(s)
+            s.setblocking(False)
+            transport, _ = await aioloop.create_datagram_endpoint(
+                lambda: ForzaDatagramProtocol(self, s), sock=s)
+            self.open_recorder()
+            while self.isRunning:
+                try:
+                    await asyncio.wait_for(stop.wait(), self.TIMEOUT)
+                except asyncio.TimeoutError:
+                    if not self.received and self.state in ['Started',
+                                                            'Receiving']:
+                        self.set_state('Timeout')
+                    self.received = False
+        except BaseException as e:
+            eventlog.error('udp_loop', '{error}', error=e)
+        finally:
+            if transport is not None:
+                transport.close()
+            self.close_recorder()
+            self.stop_async = None
+
+    #called by ForzaDatagramProtocol with a datagram, the socket is drained of
+    #all pending datagrams before any is passed to loop_func
+    #every packet is passed to loop_func: only the newest one is marked as
+    #newest, the older ones are outdated for a beep decision
+    def receive_batch(self, data, sock):
+        recv_time = perf_counter()
+        if self.latency is not None:
+            self.latency.set_recv_time(recv_time)
+        fdps = []
+        relayed = [] #the buffer is reused: relayed datagrams are copied
+        try:
+            self.get_session_view(len(data))
+            fdps.append(self.receive_packet(data, recv_time))
+            if self.relay is not None:
+                relayed.append(data)
+            while True:
+                data = self.get_session_view(sock.recv_into(self.buffer))
+                fdps.append(self.receive_packet(data, recv_time))
+                if self.relay is not None:
+                    relayed.append(bytes(data))
+        except (BlockingIOError, InterruptedError):
+            pass
+        except BaseException as e:
+            eventlog.error('udp_receive', 'BaseException {error}', error=e)
+        if not fdps:
+            return
+
+        self.received = True
+        self.packets += len(fdps)
+        self.coalesced += len(fdps) - 1
+        if self.state in ['Started', 'Waiting', 'Timeout']:
+            self.set_state('Receiving')
+        if self.loop_func is not None:
+            for fdp in fdps[:-1]:
+                self.loop_func(fdp, newest=False)
+            self.loop_func(fdps[-1])
+        for data in relayed:
+            self.relay.send(data)
 
     def is_running(self):
         return self.isRunning
@@ -62,12 +254,53 @@ class ForzaUDPLoop():
         """close program
         """
         self.isRunning = False
+        if self.stop_async is not None:
+            self.stop_async()
         self.threadPool.shutdown(wait=False)
+        if self.relay is not None:
+            print(self.relay.get_status())
+            self.relay.close()
         
     def nextFdp(self, server_socket):
+        value = self.recvFdp(server_socket)
+        if value is None and self.state in ['Started', 'Receiving']:
+            self.set_state('Timeout')
+        if value is not None and self.state in ['Started','Waiting','Timeout']:
+            self.set_state('Receiving')
+        return value
+
+    #recv_into returns only the size: the sender address is not used
+    def recvFdp(self, server_socket):
         try:
-            rawdata, _ = server_socket.recvfrom(1024)
-            return ForzaDataPacket(rawdata, packet_format=self.packet_format)
+            data = self.get_session_view(server_socket.recv_into(self.buffer))
+            recv_time = perf_counter()
+            if self.latency is not None:
+                self.latency.set_recv_time(recv_time)
+            return self.receive_packet(data, recv_time)
+        except socket.timeout: #nothing received for TIMEOUT seconds
+            eventlog.debug('udp_timeout', 'timed out')
+            return None
         except BaseException as e:
-            print(f"BaseException {e}")
-            return None
\ No newline at end of file
+            eventlog.error('udp_receive', 'BaseException {error}', error=e)
+            return None
+
+    #data is a packet of the current session size
+    def receive_packet(self, data, recv_time):
+        if self.recorder is not None:
+            self.recorder.write(data, recv_time)
+        fdp = self.decode(data, self.session_decode)
+        self.packet_stats.update(fdp.timestamp_ms, recv_time)
+        return fdp
+
+    #also used to decode replayed packets, in which case the format is 
+    #detected per packet
+    def decode(self, rawdata, decode_func=None):
+        if decode_func is not None:
+            fdp = decode_func(rawdata)
+        elif self.decoder is not None:
+            fdp = self.decoder.decode(rawdata)
+        else:
+            fdp = ForzaDataPacket(rawdata, packet_format=self.packet_format)
+        if self.latency is not None:
+            self.latency.record_since_recv('decode')
+        return fdp
\ No newline at end of file
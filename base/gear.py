@@ -6,11 +6,11 @@ Created on Wed Aug  2 20:46:58 2023
 """
 import math
 import statistics
-from collections import deque
 
-from mttkinter import mtTkinter as tkinter
 
-from utility import derive_gearratio, calculate_shiftrpm
+from utility import derive_gearratio, solve_shiftrpms, log_shiftrpm
+from base.slidingwindow import SlidingWindowStats
+from base.eventlog import eventlog
 
 #The Forza series is limited to 10 gears (ignoring reverse)
 MAXGEARS = 10
@@ -72,14 +72,23 @@ class GearState():
 #class to hold all variables per individual gear
 class Gear():
     DEQUE_MIN, DEQUE_LEN  = 40, 60
+    
+    #packet properties read by update through derive_gearratio
+    FDP_FIELDS = ['current_engine_rpm', 'speed', 'drivetrain_type',
+                  'wheel_rotation_speed_FL', 'wheel_rotation_speed_FR',
+                  'wheel_rotation_speed_RL', 'wheel_rotation_speed_RR']
 
     #              FWD    RWD    AWD
     VAR_BOUNDS = [1e-04, 1e-04, 1e-04]
+    
+    #the running variance is within ~1e-10 relative of the exact variance
+    #within this relative distance of the bound, use the exact variance
+    VAR_EXACT_MARGIN = 1e-8
 
     def __init__(self, number, config):
         self.gear = number
         self.state = GearState(label=f'Gear {number}')
-        self.ratio_deque = deque(maxlen=self.DEQUE_LEN)
+        self.ratio_stats = SlidingWindowStats(maxlen=self.DEQUE_LEN)
         self.shiftrpm = -1
         self.ratio = 0
         self.relratio = 0
@@ -87,7 +96,7 @@ class Gear():
 
     def reset(self):
         self.state.reset()
-        self.ratio_deque.clear()
+        self.ratio_stats.clear()
         self.set_shiftrpm(-1)
         self.set_ratio(0)
         self.set_relratio(0)
@@ -140,35 +149,40 @@ class Gear():
         if not (ratio := derive_gearratio(fdp)):
             return
 
-        self.ratio_deque.append(ratio)
-        if len(self.ratio_deque) < 10:
+        self.ratio_stats.add(ratio)
+        if len(self.ratio_stats) < 10:
             return
 
-        median = statistics.median(self.ratio_deque)
-        variance = statistics.variance(self.ratio_deque)
+        median = self.ratio_stats.median()
+        variance = self.ratio_stats.variance()
+        var_bound = self.VAR_BOUNDS[fdp.drivetrain_type]
+        if abs(variance - var_bound) <= var_bound * self.VAR_EXACT_MARGIN:
+            variance = statistics.variance(self.ratio_stats.deque)
         self.set_ratio(median)
         self.set_variance(variance)
 
-        if (self.variance < self.VAR_BOUNDS[fdp.drivetrain_type] and
-                len(self.ratio_deque) >= self.DEQUE_MIN):
+        if (self.variance < var_bound and
+                len(self.ratio_stats) >= self.DEQUE_MIN):
             self.to_next_state() #implied from reached to locked
-            print(f'LOCKED {self.gear}: {median:.3f}')
+            eventlog.info('gear_locked', 'LOCKED {gear}: {ratio:.3f}',
+                          gear=self.gear, ratio=median)
             return True
 
-    def calculate_shiftrpm(self, rpm, power, nextgear):
+    #relative ratio to the next gear if a shift rpm can be calculated
+    def get_calculable_relratio(self, nextgear):
         if (self.state.at_locked() and nextgear.state.at_least_locked()):
-            relratio = self.get_ratio() / nextgear.get_ratio()
-            print(f"Calculating shiftrpm for gear {self.gear}, relratio {relratio:.2f}")
-            shiftrpm = calculate_shiftrpm(rpm, power, relratio)
+            return self.get_ratio() / nextgear.get_ratio()
+        return None
 
-            self.set_relratio(relratio)
-            self.set_shiftrpm(shiftrpm)
-
-            self.to_next_state()
+    def set_calculated(self, relratio, shiftrpm):
+        self.set_relratio(relratio)
+        self.set_shiftrpm(shiftrpm)
+        self.to_next_state()
 
 #class to hold all gears up to the maximum of MAXGEARS
 class Gears():
     GEARLIST = range(1, MAXGEARS+1)
+    FDP_FIELDS = ['gear'] + Gear.FDP_FIELDS
 
     #first element is None to enable a 1:1 mapping of array to Gear number
     #it could be used as reverse gear but not in a usable manner anyway
@@ -183,9 +197,47 @@ class Gears():
         for g in self.gears[1:]:
             g.newrun_decrease_state() #force recalculation of rpm
 
-    def calculate_shiftrpms(self, rpm, power):
-        for g1, g2 in zip(self.gears[1:-1], self.gears[2:]):
-            g1.calculate_shiftrpm(rpm, power, g2)
+    #shiftrpms optionally maps relative ratios to precalculated shift rpms,
+    #calculated shift rpms are added to it. All missing relative ratios are
+    #solved in one call.
+    #gears optionally limits the calculation to the pairs of these lower gears
+    def calculate_shiftrpms(self, rpm, power, shiftrpms=None, gears=None):
+        if gears is None:
+            gears = range(1, MAXGEARS)
+        if shiftrpms is None:
+            shiftrpms = {}
+        pairs = []
+        for gear in gears:
+            if not 0 < gear < MAXGEARS:
+                continue
+            g1, g2 = self.gears[gear], self.gears[gear+1]
+            if (relratio := g1.get_calculable_relratio(g2)) is not None:
+                pairs.append((g1, relratio))
+        missing = list(dict.fromkeys(relratio for _, relratio in pairs
+                                     if relratio not in shiftrpms))
+        solved = {}
+        if missing:
+            solved = dict(zip(missing, zip(*solve_shiftrpms(rpm, power, 
+                                                            missing))))
+        for gear, relratio in pairs:
+            if relratio not in shiftrpms:
+                shiftrpm, count = solved[relratio]
+                eventlog.info('calculate_shiftrpm', 
+                    'Calculating shiftrpm for gear {gear}, relratio {relratio:.2f}',
+                    gear=gear.gear, relratio=relratio)
+                log_shiftrpm(shiftrpm, relratio, count)
+                shiftrpms[relratio] = shiftrpm
+            gear.set_calculated(relratio, shiftrpms[relratio])
+
+    #True if a gear has not locked its ratio yet, including unused gears
+    def is_any_unlocked(self):
+        return any(not g.state.at_least_locked() for g in self.gears[1:])
+
+    #relative ratios of all gear pairs calculate_shiftrpms would calculate
+    def get_calculable_relratios(self):
+        relratios = [g1.get_calculable_relratio(g2) 
+                     for g1, g2 in zip(self.gears[1:-1], self.gears[2:])]
+        return [relratio for relratio in relratios if relratio is not None]
 
     def get_shiftrpm_of(self, gear):
         if 0 < gear <= MAXGEARS:
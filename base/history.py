@@ -5,9 +5,11 @@ Created on Wed Jul 17 19:59:17 2024
 @author: RTB
 """
 from utility import packets_to_ms
+from base.eventlog import eventlog
 
 class History():
     COLUMNS = ['target', 'shiftrpm', 'gear', 'beep_distance']
+    FDP_FIELDS = [] #shift data is passed in by ForzaBeep
     def __init__(self, config):
         self.log_basic_shiftdata = config.log_basic_shiftdata
         self.history = []
@@ -30,8 +32,12 @@ class History():
         beep_distance_ms = 'N/A'
         if beep_distance is not None:
             beep_distance_ms = packets_to_ms(beep_distance)
-        print(f"gear {gear}-{gear+1}: {shiftrpm:.0f} actual shiftrpm, {target:.0f} target, {difference} difference, {beep_distance_ms} ms distance to beep")
-        print("-"*50)
+        eventlog.info('basic_shiftdata', 
+            'gear {gear}-{nextgear}: {shiftrpm:.0f} actual shiftrpm, '
+            '{target:.0f} target, {difference} difference, '
+            '{beep_distance} ms distance to beep\n' + '-'*50,
+            gear=gear, nextgear=gear+1, shiftrpm=shiftrpm, target=target,
+            difference=difference, beep_distance=beep_distance_ms)
     
     def update(self, target, shiftrpm, gear, beep_distance):
         point = self.get_shiftpoint(target, shiftrpm, gear, beep_distance)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:21:07 2026
+
+@author: RTB
+"""
+
+from time import perf_counter
+
+import numpy as np
+
+#Timing probes for the packet pipeline. Each stage has a preallocated ring of
+#the most recent durations in seconds.
+#There is a single writer, the packet thread, and no lock: a reader copies the
+#ring and may miss a sample that is being written, which is fine for stats.
+#The packet thread sets recv_time when a packet arrives: the time from then
+#until the beep is dispatched is the latency of the tone itself.
+class LatencyProbes():
+    PERCENTILES = [50, 95, 99]
+
+    def __init__(self, maxlen=3600):
+        self.maxlen = maxlen
+        self.stages = {} #stage name: row in samples
+        self.samples = np.zeros((0, maxlen))
+        self.counts = []
+        self.recv_time = None
+
+    #the stage is published last: a reader never sees a stage without a row
+    def add_stage(self, stage):
+        self.counts.append(0)
+        self.samples = np.vstack([self.samples, np.zeros(self.maxlen)])
+        self.stages[stage] = len(self.stages)
+
+    def record(self, stage, duration):
+        if stage not in self.stages:
+            self.add_stage(stage)
+        row = self.stages[stage]
+        count = self.counts[row]
+        self.samples[row, count % self.maxlen] = duration
+        self.counts[row] = count + 1
+
+    #record the time since start, returns the current time
+    def record_since(self, stage, start):
+        now = perf_counter()
+        self.record(stage, now - start)
+        return now
+
+    def set_recv_time(self, recv_time=None):
+        self.recv_time = perf_counter() if recv_time is None else recv_time
+
+    #time from the packet arriving to now
+    def record_since_recv(self, stage):
+        if self.recv_time is not None:
+            self.record_since(stage, self.recv_time)
+
+    #returns a dictionary of stage: (count, p50, p95, p99, max) in ms
+    def get_stats(self):
+        stats = {}
+        for stage, row in list(self.stages.items()):
+            count = self.counts[row]
+            if count == 0:
+                continue
+            samples = self.samples[row, :min(count, self.maxlen)] * 1000
+            percentiles = np.percentile(samples, self.PERCENTILES)
+            stats[stage] = (count, *percentiles, samples.max())
+        return stats
+
+    def dump(self):
+        header = ['stage', 'count'] + [f'p{p}' for p in self.PERCENTILES]
+        header.append('max')
+        lines = ['{:<26}{:>8}'.format(*header[:2]) +
+                 ''.join(f'{name:>9}' for name in header[2:]) + ' (ms)']
+        for stage, (count, *values) in self.get_stats().items():
+            lines.append(f'{stage:<26}{count:>8}' + 
+                         ''.join(f'{value:>9.3f}' for value in values))
+        return '\n'.join(lines)
+
+    def reset(self):
+        self.samples[:] = 0
+        self.counts = [0]*len(self.counts)
@@ -5,28 +5,30 @@ Created on Wed Aug  2 21:05:07 2023
 @author: RTB
 """
 
-import statistics
-from collections import deque
+from base.slidingwindow import SlidingLinearRegression
 
 #class that maintains a deque used for linear regression. This smooths the rpms
 #and provides a slope to predict future RPM values.
+#The regression is updated incrementally per added rpm value
 class Lookahead():
+    FDP_FIELDS = [] #only reads the hysteresis rpm
+
     def __init__(self, config):
         self.minlen = config.linreg_len_min
-        self.deque = deque(maxlen=config.linreg_len_max)
+        self.linreg = SlidingLinearRegression(maxlen=config.linreg_len_max)
+        self.deque = self.linreg.deque
         self.clear_linreg_vars()
 
     def add(self, rpm):
-        self.deque.append(rpm)
+        self.linreg.add(rpm)
         self.set_linreg_vars()
 
     #x is the frame distance to the most recently added point
     #this has the advantage that the slope is counted from the most recent point
     def set_linreg_vars(self):
-        if len(self.deque) < self.minlen:
+        if len(self.linreg) < self.minlen:
             return
-        x, y = range(-len(self.deque)+1, 1), self.deque
-        self.slope, self.intercept = statistics.linear_regression(x, y)
+        self.slope, self.intercept = self.linreg.get()
 
     #slope factor is used to shape the prediction with more information than
     #from just the linear regression. As RPM is not linear, it will otherwise
@@ -39,7 +41,7 @@ class Lookahead():
         return 0 <= distance <= lookahead
     
     def reset(self):
-        self.deque.clear()
+        self.linreg.clear()
         self.clear_linreg_vars()
 
     def clear_linreg_vars(self):
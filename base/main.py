@@ -6,8 +6,7 @@ Created on Sun Aug 18 10:45:28 2024
 """
 
 import math
-
-from collections import deque
+from time import perf_counter
 
 from config import config, FILENAME_SETTINGS
 config.load_from(FILENAME_SETTINGS)
@@ -24,8 +23,19 @@ from base.configvar import (HysteresisPercent, DynamicToneOffsetToggle, Volume,
                             IncludeReplay)
 from base.lookahead import Lookahead
 from base.runcollector import RunCollector
+from base.telemetrybuffer import TelemetryBuffer
+from base.curveworker import CurveWorker
+from base.latency import LatencyProbes
+from base.telemetrylog import TelemetryReplayer
+from base.fanin import ForzaFanIn
+from base.shifttonestate import ShiftToneStatePublisher
+from base.audio import AudioEngine
+from base.eventlog import eventlog
+from base.stagepipeline import StagePipeline, Stage
+from base.eventbus import EventBus
+from base.shiftrpmservice import ShiftRPMService
 
-from utility import beep, multi_beep, Variable
+from utility import Variable, solve_shiftrpms, log_shiftrpm
 
 
 #TODO:
@@ -39,16 +49,63 @@ from utility import beep, multi_beep, Variable
 #main class for ForzaShiftTone
 #it is responsible for the main loop
 class ForzaBeep():
-    def __init__(self):
+    SHIFTDELAY_MAXLEN = 120 #packets considered before a shift
+    #events that change whether a curve is loaded, pending or missing
+    CURVE_EVENTS = ['curve_pending', 'curve_loaded', 'curve_discarded']
+    #stages of loop_func in order, compiled once into a StagePipeline
+    #a stage with an active predicate only runs while it returns True. The
+    #predicate is evaluated again on reset and on the events in its inputs,
+    #see base.eventbus
+    STAGES = [
+        #reset if car ordinal/PI changes
+        Stage('loop_test_car_changed'),
+        #apply curve computed by curve worker
+        Stage('loop_apply_curve', 'is_curve_pending', CURVE_EVENTS),
+        #update tach and hysteresis rpm
+        Stage('loop_update_rpm'),
+        #guess revlimit if not defined yet
+        Stage('loop_guess_revlimit', 'is_revlimit_unknown', ['curve_loaded']),
+        #update lookahead with hysteresis rpm
+        Stage('loop_linreg'),
+        #add data point for curve collecting
+        Stage('loop_datacollector', 'is_curve_missing', CURVE_EVENTS),
+        #update gear ratio and state of gear
+        Stage('loop_update_gear', 'is_gear_unlocked', ['gear_locked']),
+        #test if we have shifted
+        Stage('loop_test_for_shiftrpm'),
+        #test if we need to beep
+        Stage('loop_beep'),
+        #dump a table when a shift happens
+        # Stage('loop_shiftdump'),
+        Stage('debug_log_full_shiftdata', 'is_logging_shiftdata')
+        ]
+    #stages replaced for packets that are not the newest, see loop_func
+    OUTDATED_STAGES = {'loop_beep': 'loop_beep_outdated'}
+    #variables the user can change while running, see set_variable
+    SETTABLE_VARS = ['revlimit_percent', 'revlimit_offset', 
+                     'hysteresis_percent', 'volume', 'dynamictoneoffset',
+                     'includereplay', 'tone_offset']
+
+    #packet properties read by ForzaBeep itself. Every other consumer of the
+    #packet declares its own FDP_FIELDS, see get_fdp_fields
+    FDP_FIELDS = ['car_ordinal', 'car_performance_index', 'engine_idle_rpm',
+                  'engine_max_rpm', 'current_engine_rpm', 'gear', 'accel',
+                  'clutch', 'power']
+
+    #start is False for a headless instance that is driven by replay
+    def __init__(self, start=True):
         self.init_vars()     
-        self.loop.firststart() #trigger start of loop
+        self.loop.add_listener(self.publish_state)
+        if start:
+            self.loop.firststart() #trigger start of loop
 
     #variables are defined again in init_gui_vars, purpose is to split baseline
     #and gui eventually
     def init_vars(self):
-        self.loop = ForzaUDPLoop(config, loop_func=self.loop_func)
+        #history of recent packets shared by datacollector and shift tests
+        self.telemetry = TelemetryBuffer(config.telemetry_buffer_len)
         self.gears = Gears(config)
-        self.datacollector = RunCollector(config)
+        self.datacollector = RunCollector(config, self.telemetry)
         self.lookahead = Lookahead(config)
         self.history = History(config)
         
@@ -61,7 +118,7 @@ class ForzaBeep():
         self.dynamictoneoffset = DynamicToneOffsetToggle(config)
         self.includereplay = IncludeReplay(config)
         
-        # self.shiftdump = ShiftDump(self.lookahead)
+        # self.shiftdump = ShiftDump(self.lookahead, self.telemetry)
         
         self.rpm = RPM(hysteresis_percent=self.hysteresis_percent)
         self.volume = Volume(config)
@@ -72,8 +129,54 @@ class ForzaBeep():
         self.revlimit = Variable(defaultvalue=-1)
         
         self.curve = EngineCurve(config)
-
-        self.shiftdelay_deque = deque(maxlen=120)
+        self.curve_version = 0
+        self.curve_peakpower = None
+
+        #curve and gear changes, see base.eventbus
+        self.bus = EventBus()
+        #calculates shift rpms when a curve loads or a gear locks
+        self.shiftrpm_service = ShiftRPMService(self, self.bus)
+        #loads and derives curves off the packet thread, see handle_curve_change
+        self.curve_worker = CurveWorker()
+
+        #the packets since the last shift are the most recent rows in telemetry
+        self.shiftdelay_len = 0
+        self.shiftdelay_gear = None
+        self.telemetry.add_listener(self.telemetry_reset)
+
+        #timing of decode, each stage in loop_func and beep dispatch
+        self.latency = None
+        if config.latency_probes:
+            self.latency = LatencyProbes(config.latency_probes_len)
+
+        #plays preloaded sounds on its own thread, see base.audio
+        self.audio = AudioEngine(config, latency=self.latency)
+
+        self.loop = ForzaUDPLoop(config, loop_func=self.loop_func,
+                                 fields=self.get_fdp_fields(),
+                                 latency=self.latency)
+
+        #snapshot of the displayed state for readers outside loop_func
+        self.statepublisher = ShiftToneStatePublisher()
+
+        #the stages of loop_func as bound methods, with optional profiling
+        self.pipeline = StagePipeline(self, self.STAGES, self.OUTDATED_STAGES,
+                                      self.latency)
+        self.pipeline.subscribe(self.bus)
+        self.pipeline.set_profiling(config.stage_profiling)
+
+    #union of the packet properties the pipeline reads. The UDP loop decodes
+    #only these if config.packet_projection is set
+    def get_fdp_fields(self):
+        if not config.packet_projection:
+            return None
+        consumers = [self, self.gears, self.datacollector, self.rpm,
+                     self.lookahead, self.history, self.curve,
+                     self.hysteresis_percent, self.includereplay]
+        fields = set()
+        for consumer in consumers:
+            fields.update(consumer.FDP_FIELDS)
+        return fields
 
     def reset(self, *args):
         self.rpm.reset()
@@ -84,32 +187,112 @@ class ForzaBeep():
         self.datacollector.reset()
         self.revlimit.reset()
         self.curve.reset()
+        self.curve_version += 1
+        self.curve_peakpower = None
+        self.curve_worker.reset()
+        self.bus.emit('curve_reset', version=self.curve_version)
         # self.shiftdump.reset()
         
         self.we_beeped = 0
         self.beep_counter = 0
         self.debug_target_rpm = -1
 
-        self.shiftdelay_deque.clear()
+        self.shiftdelay_len = 0
+        self.shiftdelay_gear = None
         self.tone_offset.reset_counter() #should this be reset_to_current_value?
+        self.pipeline.refresh()
+
+    #the telemetry buffer was re-created for a new packet format: the packets
+    #since the last shift are no longer in it
+    def telemetry_reset(self):
+        self.shiftdelay_len = 0
+        self.shiftdelay_gear = None
+        self.tone_offset.reset_counter()
+
+    #active predicates of the stages, see STAGES
+    def is_curve_pending(self):
+        return self.curve_worker.is_pending()
+
+    def is_curve_missing(self):
+        return not (self.curve.is_loaded() or self.curve_worker.is_pending())
+
+    def is_revlimit_unknown(self):
+        return config.revlimit_guess != -1 and self.revlimit.get() == -1
+
+    def is_gear_unlocked(self):
+        return self.gears.is_any_unlocked()
+
+    def is_logging_shiftdata(self):
+        return config.log_full_shiftdata
     
     #called when car ordinal changes or data collector finishes a run
+    #the curve is loaded or derived on the curve worker, the packet thread
+    #picks up the result in loop_apply_curve
     def handle_curve_change(self, fdp, *args, **kwargs):
-        print("Handle_curve_change")
-        self.curve.update(fdp, *args, **kwargs)
-                
-        if not self.curve.is_loaded():
+        eventlog.info('curve_change', 'Handle_curve_change')
+        relratios = self.gears.get_calculable_relratios()
+        self.curve_worker.submit(self.compute_curve, fdp, relratios, 
+                                 *args, **kwargs)
+        self.bus.emit('curve_pending')
+
+    #runs on the curve worker: reads only config and the arguments it is given
+    #returns a new EngineCurve, the tested run if any, and the shift rpms of 
+    #the given relratios
+    def compute_curve(self, fdp, relratios, *args, run=None, **kwargs):
+        curve = EngineCurve(config)
+        if run is not None:
+            run = self.datacollector.test_run(run)
+            if run is None:
+                return curve, None, {}
+            kwargs['run'] = run
+        curve.update(fdp, *args, **kwargs)
+        if not curve.is_loaded():
+            return curve, run, {}
+
+        if not relratios:
+            return curve, run, {}
+        solved, counts = solve_shiftrpms(*curve.get_rpmpower(), relratios)
+        for relratio, shiftrpm, count in zip(relratios, solved, counts):
+            eventlog.info('calculate_shiftrpm', 
+                          'Calculating shiftrpm for relratio {relratio:.2f}',
+                          relratio=relratio)
+            log_shiftrpm(shiftrpm, relratio, count)
+        return curve, run, dict(zip(relratios, solved))
+
+    #apply the result of the curve worker in one go
+    #a failed job is discarded: the datacollector starts a new run
+    def loop_apply_curve(self, fdp):
+        try:
+            result = self.curve_worker.poll()
+        except Exception as e:
+            eventlog.error('curve_error', 'Curve job failed: {error}', error=e)
+            self.datacollector.reset()
+            self.bus.emit('curve_discarded')
             return
-        
-        print("Setting data because curve is loaded")
+        if result is not None:
+            self.apply_curve(*result)
+
+    def apply_curve(self, curve, run, shiftrpms):
+        if self.datacollector.is_run_completed():
+            if run is None: #run failed its test: collect a new one
+                self.datacollector.reset()
+            else:
+                self.datacollector.set_done(run)
+        if not curve.is_loaded():
+            self.bus.emit('curve_discarded')
+            return
+
+        eventlog.info('apply_curve', 'Setting data because curve is loaded')
+        self.curve.copy_from(curve)
+        self.curve_version += 1
+        self.curve_peakpower = self.curve.get_peakpower_tuple()
         self.revlimit.set(self.curve.get_revlimit())        
-        self.gears.calculate_shiftrpms(*self.curve.get_rpmpower())
+        self.bus.emit('curve_loaded', version=self.curve_version, 
+                      shiftrpms=shiftrpms)
         
         if config.notification_power_enabled:
-            multi_beep(config.notification_file,
-                       config.notification_file_duration,
-                       config.notification_power_count,
-                       config.notification_power_delay)
+            self.audio.notify(config.notification_power_count,
+                              config.notification_power_delay)
 
     #reset if the car_ordinal changes
     #if a car has more than 8 gears, the packet won't contain the ordinal as
@@ -122,10 +305,15 @@ class ForzaBeep():
         if self.car_ordinal.test(ordinal):
             self.reset()
             self.car_ordinal.set(ordinal)
-            print(f'New ordinal {self.car_ordinal.get()}, PI {fdp.car_performance_index}, resetting!')
-            print(f'New car: {self.car_ordinal.get_name()}')
-            print(f'Hysteresis: {self.hysteresis_percent.as_rpm(fdp):.1f} rpm')
-            print(f'Engine: {fdp.engine_idle_rpm:.0f} min rpm, {fdp.engine_max_rpm:.0f} max rpm')
+            eventlog.info('car_changed', 
+                'New ordinal {ordinal}, PI {pi}, resetting!\n'
+                'New car: {name}\n'
+                'Hysteresis: {hysteresis:.1f} rpm\n'
+                'Engine: {idle_rpm:.0f} min rpm, {max_rpm:.0f} max rpm',
+                ordinal=self.car_ordinal.get(), pi=fdp.car_performance_index,
+                name=self.car_ordinal.get_name(),
+                hysteresis=self.hysteresis_percent.as_rpm(fdp),
+                idle_rpm=fdp.engine_idle_rpm, max_rpm=fdp.engine_max_rpm)
             
             self.handle_curve_change(fdp)
 
@@ -139,14 +327,16 @@ class ForzaBeep():
         if config.revlimit_guess != -1 and self.revlimit.get() == -1:
             self.revlimit.set(fdp.engine_max_rpm - config.revlimit_guess, 
                               state='guess')
-            print(f'guess revlimit: {self.revlimit.get()}')    
+            eventlog.info('guess_revlimit', 'guess revlimit: {revlimit}',
+                          revlimit=self.revlimit.get())
 
     def loop_linreg(self, fdp):
         self.lookahead.add(self.rpm.get()) #update linear regresion
 
     #set curve with drag data if we collected a complete run
+    #the datacollector waits while the curve worker is busy
     def loop_datacollector(self, fdp):
-        if self.curve.is_loaded():
+        if self.curve.is_loaded() or self.curve_worker.is_pending():
             return
         
         self.datacollector.update(fdp)
@@ -155,22 +345,18 @@ class ForzaBeep():
             return
 
         #state: No curve loaded and datacollector run is completed
-        print("shipping data to EngineCurve")
+        eventlog.info('run_completed', 'shipping data to EngineCurve')
         self.handle_curve_change(fdp, **self.datacollector.get_data())
 
     def loop_update_gear(self, fdp):
         if fdp.clutch > 0:
             return
-        if self.gears.update(fdp) and config.notification_gear_enabled:
-            multi_beep(config.notification_file,
-                       config.notification_file_duration,
-                       config.notification_gear_count,
-                       config.notification_gear_delay)
-
-    #update call with get_rpmpower
-    def loop_calculate_shiftrpms(self, _):
-        if self.curve.is_loaded():
-            self.gears.calculate_shiftrpms(*self.curve.get_rpmpower())
+        if not self.gears.update(fdp):
+            return
+        self.bus.emit('gear_locked', gear=int(fdp.gear))
+        if config.notification_gear_enabled:
+            self.audio.notify(config.notification_gear_count,
+                              config.notification_gear_delay)
 
     #Function to derive the rpm the player started an upshift at full throttle
     #FM disengages the clutch in 1 frame according to telemetry
@@ -180,12 +366,16 @@ class ForzaBeep():
     #Then power is still negative but the internal throttle is then ramped up
     #until we are back at full power. Also invisible in Data Out.
     #TODO: With a power curve we can derive a full shift duration
+    #The packets since the previous shift are the shiftdelay_len rows in
+    #telemetry before the current packet, up to SHIFTDELAY_MAXLEN
     def loop_test_for_shiftrpm(self, fdp):
         #case gear is the same in new fdp or we start from zero
-        if (len(self.shiftdelay_deque) == 0 or 
-            (prevgear := self.shiftdelay_deque[0].gear) == fdp.gear or
+        if (self.shiftdelay_len == 0 or 
+            (prevgear := self.shiftdelay_gear) == fdp.gear or
             (prevgear != 11 and fdp.gear == 11)):
-            self.shiftdelay_deque.appendleft(fdp)
+            self.shiftdelay_len = min(self.shiftdelay_len + 1,
+                                      self.SHIFTDELAY_MAXLEN)
+            self.shiftdelay_gear = fdp.gear
             self.tone_offset.increment_counter()
             return
         # #case gear has gone down: reset
@@ -197,18 +387,22 @@ class ForzaBeep():
         #case gear has gone up or down after a shift
         # prev_packet = fdp
         shiftrpm = None
-        for packet in self.shiftdelay_deque:
-            if packet.accel != 255:
+        packets = self.telemetry.window(self.shiftdelay_len, offset=1)[::-1]
+        for accel, gear, power, rpm in zip(packets['accel'].tolist(),
+                                           packets['gear'].tolist(),
+                                           packets['power'].tolist(),
+                                     packets['current_engine_rpm'].tolist()):
+            if accel != 255:
                 break
-            if packet.gear == 11:
+            if gear == 11:
                 self.tone_offset.decrement_counter()
                 continue
-            if packet.gear + 1 != fdp.gear: #reset if downshift
+            if gear + 1 != fdp.gear: #reset if downshift
                 break
-            if packet.power < 0:
+            if power < 0:
                 self.tone_offset.decrement_counter()
                 continue
-            shiftrpm = packet.current_engine_rpm
+            shiftrpm = rpm
             break
 
             self.tone_offset.decrement_counter()
@@ -220,13 +414,31 @@ class ForzaBeep():
                 self.tone_offset.finish_counter() #update dynamic offset logic
         self.we_beeped = 0
         self.debug_target_rpm = -1
-        self.shiftdelay_deque.clear()
+        self.shiftdelay_len = 0
+        self.shiftdelay_gear = None
         self.tone_offset.reset_counter()
 
     #play beep depending on volume. If volume is zero, skip beep
     def do_beep(self):
         if volume_level := self.volume.get():
-            beep(filename=config.sound_files[volume_level])
+            if self.latency is None:
+                self.audio.beep_volume(volume_level)
+                return
+            self.latency.record_since_recv('packet_to_beep')
+            start = perf_counter()
+            self.audio.beep_volume(volume_level, start)
+            self.latency.record_since('beep_dispatch', start)
+
+    #loop_beep for a packet that has a newer one waiting: keep the beep
+    #counter going, but do not decide on a beep with outdated data
+    def loop_beep_outdated(self, fdp):
+        if fdp.gear > MAXGEARS or self.beep_counter <= 0:
+            return
+        if self.gears.is_highest(fdp.gear):
+            return
+        beep_rpm = self.gears.get_shiftrpm_of(fdp.gear)
+        if fdp.current_engine_rpm < beep_rpm or beep_rpm == -1:
+            self.beep_counter -= 1
 
     def loop_beep(self, fdp):
         if fdp.gear > MAXGEARS:
@@ -251,36 +463,34 @@ class ForzaBeep():
 
     def debug_log_full_shiftdata(self, fdp):
         if self.we_beeped > 0 and config.log_full_shiftdata:
-            print(f'rpm {fdp.current_engine_rpm:.0f} in_gear {fdp.in_gear} throttle {fdp.accel} slope {self.lookahead.slope:.2f} intercept {self.lookahead.intercept:.2f} count {config.we_beep_max-self.we_beeped+1}')
+            eventlog.info('full_shiftdata', 
+                'rpm {rpm:.0f} in_gear {in_gear} throttle {accel} slope '
+                '{slope:.2f} intercept {intercept:.2f} count {count}',
+                rpm=fdp.current_engine_rpm, in_gear=fdp.in_gear, 
+                accel=fdp.accel, slope=self.lookahead.slope,
+                intercept=self.lookahead.intercept, 
+                count=config.we_beep_max-self.we_beeped+1)
             self.we_beeped -= 1
 
     def loop_shiftdump(self, fdp):
         self.shiftdump.update(fdp)
 
     #this function is called by the loop whenever a new packet arrives
-    def loop_func(self, fdp):        
+    #newest is False if a newer packet has already arrived: the packet is
+    #processed, but the beep decision is left to the newest packet
+    def loop_func(self, fdp, newest=True):        
         #skip if not racing or gear number outside valid range
         if not(self.includereplay.test(fdp) and self.gears.is_valid(fdp)):
             return
 
-        funcs = [
-             'loop_test_car_changed', #reset if car ordinal/PI changes
-             'loop_update_rpm',       #update tach and hysteresis rpm
-             'loop_guess_revlimit',   #guess revlimit if not defined yet
-             'loop_linreg',           #update lookahead with hysteresis rpm
-             'loop_datacollector',    #add data point for curve collecting
-             'loop_update_gear',      #update gear ratio and state of gear
-             'loop_calculate_shiftrpms',#derive shift rpm if possible
-             'loop_test_for_shiftrpm',#test if we have shifted
-             'loop_beep',             #test if we need to beep
-             # 'loop_shiftdump',        #dump a table when a shift happens
-             'debug_log_full_shiftdata'             
-                ]
-        for funcname in funcs:
-            try:
-                getattr(self, funcname)(fdp)
-            except BaseException as e:
-                print(f'{funcname} {e}')
+        self.telemetry.append(fdp)
+        self.pipeline.run(fdp, newest)
+
+        if newest:
+            self.publish_state()
+
+        if self.latency is not None:
+            self.latency.record_since_recv('packet_to_done')
 
     #TODO: Move the torque ratio function to PowerCurve
     #to account for torque not being flat, we take a linear approach
@@ -345,14 +555,24 @@ class ForzaBeep():
             self.update_target_rpm(rpm_revlimit_time)
         
         if from_gear and config.log_full_shiftdata:
-            print(f'beep from_gear: {shiftrpm:.0f}, gear {fdp.gear} rpm {fdp.current_engine_rpm:.0f} torque N/A trq_ratio {from_gear_ratio:.2f} slope {self.lookahead.slope:.2f} intercept {self.lookahead.intercept:.2f}')
+            self.log_beep_trigger('from_gear', shiftrpm, from_gear_ratio, fdp)
         if revlimit_pct and config.log_full_shiftdata:
-            print(f'beep revlimit_pct: {rpm_revlimit_pct:.0f}, gear {fdp.gear} rpm {fdp.current_engine_rpm:.0f} torque N/A trq_ratio {revlimit_pct_ratio:.2f} slope {self.lookahead.slope:.2f} intercept {self.lookahead.intercept:.2f}')
+            self.log_beep_trigger('revlimit_pct', rpm_revlimit_pct, 
+                                  revlimit_pct_ratio, fdp)
         if revlimit_time and config.log_full_shiftdata:
-            print(f'beep revlimit_time: {rpm_revlimit_time:.0f}, gear {fdp.gear} rpm {fdp.current_engine_rpm:.0f} torque N/A trq_ratio {revlimit_time_ratio:.2f} slope {self.lookahead.slope:.2f} intercept {self.lookahead.intercept:.2f}')
+            self.log_beep_trigger('revlimit_time', rpm_revlimit_time, 
+                                  revlimit_time_ratio, fdp)
 
         return from_gear or revlimit_pct or revlimit_time
 
+    def log_beep_trigger(self, trigger, target, torque_ratio, fdp):
+        eventlog.info('beep_trigger', 
+            'beep {trigger}: {target:.0f}, gear {gear} rpm {rpm:.0f} torque N/A '
+            'trq_ratio {torque_ratio:.2f} slope {slope:.2f} intercept '
+            '{intercept:.2f}', trigger=trigger, target=target, gear=fdp.gear, 
+            rpm=fdp.current_engine_rpm, torque_ratio=torque_ratio, 
+            slope=self.lookahead.slope, intercept=self.lookahead.intercept)
+
     #write all settings that can change to the config file
     def config_writeback(self, varlist=['tone_offset']):        
         try:
@@ -363,13 +583,142 @@ class ForzaBeep():
             print(e)
             print("Failed to write variables to config file")
 
-    def close(self):
+    #set a variable from SETTABLE_VARS, as a user would through the GUI
+    def set_variable(self, name, value):
+        if name not in self.SETTABLE_VARS:
+            print(f'set_variable: {name} is not settable')
+            return
+        getattr(self, name).set(value)
+        if name == 'tone_offset':
+            self.tone_offset.reset_to_current_value()
+
+    #publish a new ShiftToneState, called after every newest packet and on
+    #changes of loop state. Arguments are ignored: loop state listener
+    def publish_state(self, *args):
+        loop = self.loop
+        stats = loop.packet_stats
+        history = self.history.history
+        return self.statepublisher.publish(
+            rpm=self.rpm.get(),
+            gears=tuple((g.state.state, g.ratio, g.relratio, g.shiftrpm, 
+                         g.variance) for g in self.gears.gears[1:]),
+            revlimit=self.revlimit.get(),
+            tone_offset=self.tone_offset.get(),
+            peakpower=self.curve_peakpower,
+            car_ordinal=self.car_ordinal.get(),
+            history=tuple(history[-self.statepublisher.HISTORY_LEN:]),
+            history_count=len(history),
+            curve_version=self.curve_version,
+            vars=tuple((name, getattr(self, name).get()) 
+                       for name in self.SETTABLE_VARS),
+            loop_state=loop.state,
+            loop_running=loop.is_running(),
+            packet_stats=tuple((name, getattr(stats, name)) for name in 
+                               ['packets', 'dropped', 'late', 'jitter', 
+                                'rate', 'second_start']))
+
+    #the most recent ShiftToneState, None before the first packet
+    def get_state(self):
+        return self.statepublisher.get()
+
+    #drive loop_func from a telemetry log, see TelemetryReplayer
+    #as fast as possible (speed 0) waits for the curve worker every packet, as 
+    #if it finished instantly: the replay is then deterministic
+    def replay(self, filename, speed=1.0):
+        replayer = TelemetryReplayer(filename, speed)
+        after_func = None if speed else self.curve_worker.wait
+        replayer.run(self.loop.decode, self.loop_func, after_func, 
+                     self.latency)
+        eventlog.flush()
+        print(f'Replayed {replayer.count} packets in {replayer.duration:.2f}s: '
+              f'{replayer.get_packets_per_second():.0f} packets/s')
+        return replayer
+
+    #print per stage latency stats if probes are enabled
+    def dump_latency(self):
+        if self.latency is not None:
+            print(self.latency.dump())
+
+    #switch per stage call counts and time of loop_func, see dump_profile
+    def set_profiling(self, enabled):
+        self.pipeline.set_profiling(enabled)
+
+    #print the per stage profile if profiling is enabled
+    def dump_profile(self):
+        if (profile := self.pipeline.get_profile()) is not None:
+            print(profile.dump())
+
+    #write the call stacks of loop_func for the next seconds of packets to
+    #filename as folded stacks for a flame graph
+    def start_capture(self, seconds=None, filename=None):
+        if seconds is None:
+            seconds = config.profile_capture_seconds
+        if filename is None:
+            filename = config.profile_capture_file
+        self.pipeline.start_capture(seconds, filename)
+
+    #writeback is False to leave the settings file alone, such as after a replay
+    def close(self, writeback=True):
         self.loop.close()
-        self.config_writeback()
-
+        self.curve_worker.close()
+        self.audio.close()
+        self.pipeline.close()
+        eventlog.flush()
+        if self.audio.report:
+            print(self.audio.get_report())
+        self.dump_latency()
+        self.dump_profile()
+        if writeback:
+            self.config_writeback()
+
+#a headless ForzaBeep per rig until interrupted, prints status every 10 s
+def run_fanin(mute=False):
+    def factory():
+        forzabeep = ForzaBeep(start=False)
+        if mute:
+            forzabeep.volume.set(0)
+        return forzabeep
+    fanin = ForzaFanIn(config, factory)
+    fanin.start()
+    try:
+        while fanin.thread.is_alive():
+            fanin.thread.join(10)
+            print(fanin.get_status())
+    except KeyboardInterrupt:
+        pass
+    fanin.close()
+
+#run headless, optionally replaying a telemetry log instead of listening
 def main():
     global forzabeep #for debugging
-    forzabeep = ForzaBeep()
+    import argparse
+    parser = argparse.ArgumentParser(description='Headless ForzaShiftTone')
+    parser.add_argument('--replay', help='telemetry log to replay')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='replay speed multiplier, 0 is as fast as possible')
+    parser.add_argument('--mute', action='store_true', help='disable beeps')
+    parser.add_argument('--profile', action='store_true',
+                        help='print time per stage of loop_func on close')
+    parser.add_argument('--capture', type=float, metavar='SECONDS',
+                        help='write a flame graph of loop_func for SECONDS, '
+                             'see config.profile_capture_file')
+    parser.add_argument('--fanin', action='store_true',
+                        help='a session per rig, see config.fanin_ports')
+    args = parser.parse_args()
+
+    if args.fanin:
+        return run_fanin(args.mute)
+
+    forzabeep = ForzaBeep(start=args.replay is None)
+    if args.mute:
+        forzabeep.volume.set(0)
+    if args.profile:
+        forzabeep.set_profiling(True)
+    if args.capture is not None:
+        forzabeep.start_capture(args.capture)
+    if args.replay is not None:
+        forzabeep.replay(args.replay, args.speed)
+        forzabeep.close(writeback=False)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:05:44 2026
+
+@author: RTB
+"""
+
+#Counters on the packet stream, based on the timestamp_ms of each packet.
+#The game sends a packet per physics frame shown: 60 per second.
+#A gap of n intervals between consecutive timestamps means n-1 packets were
+#dropped, by the network or by the kernel when the receive buffer was full.
+#A timestamp at or before the previous one is a late packet: out of order or
+#duplicate. A gap of over PAUSE_MS is a pause (menu, loading), not a drop.
+#rate is packets per second received over the last second
+#jitter is the interarrival jitter of RFC 3550: the smoothed difference
+#between the receive interval and the timestamp interval
+class PacketStats():
+    INTERVAL_MS = 1000 / 60
+    PAUSE_MS = 1000
+    JITTER_GAIN = 1 / 16
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.packets = 0
+        self.dropped = 0
+        self.late = 0
+        self.jitter = 0.0 #ms
+        self.rate = 0
+        self.prev_timestamp = None
+        self.prev_recv_time = None
+        self.second_start = None
+        self.second_count = 0
+
+    #timestamp_ms is the packet timestamp, recv_time a time.perf_counter value
+    def update(self, timestamp_ms, recv_time):
+        self.packets += 1
+
+        if self.second_start is None or recv_time - self.second_start >= 1:
+            if self.second_start is not None:
+                self.rate = self.second_count / (recv_time - self.second_start)
+            self.second_start = recv_time
+            self.second_count = 0
+        self.second_count += 1
+
+        if self.prev_timestamp is not None:
+            #timestamp_ms is an unsigned 32 bit value, allow for wrapping
+            delta = (timestamp_ms - self.prev_timestamp) % 2**32
+            if delta == 0 or delta > 2**31:
+                self.late += 1
+                return
+            if delta <= self.PAUSE_MS:
+                self.dropped += max(round(delta / self.INTERVAL_MS) - 1, 0)
+                recv_delta = (recv_time - self.prev_recv_time) * 1000
+                self.jitter += (abs(recv_delta - delta) - self.jitter
+                                ) * self.JITTER_GAIN
+        self.prev_timestamp = timestamp_ms
+        self.prev_recv_time = recv_time
+
+    #receive rate is stale if no packets arrive: it is only updated on update
+    def get_rate(self, now):
+        if self.second_start is None or now - self.second_start > 2:
+            return 0
+        return self.rate
+
+    #summary for display, now is a time.perf_counter value
+    def get_text(self, now):
+        return (f'{self.get_rate(now):.0f} Hz, jitter {self.jitter:.1f} ms\n'
+                f'{self.dropped} dropped, {self.late} late')
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:37 2026
+
+@author: RTB
+"""
+
+import threading
+import multiprocessing
+
+#Runs receive, decode and beep decisions in a child process so the GUI
+#process (Tk, matplotlib) can never delay a beep through the GIL.
+#The child runs a headless ForzaBeep and sends every ShiftToneState it
+#publishes, see SnapshotPublisher. The GUI process polls for snapshots and
+#sends commands:
+#   ('toggle', value)   start/stop the UDP loop, as ForzaUDPLoop.toggle
+#   ('reset',)          reset the pipeline
+#   ('set', name, value) set a configurable variable of ForzaBeep
+#   ('close',)          close the pipeline and end the child process
+
+#sends each ShiftToneState of a ForzaBeep as a snapshot dict. The curve
+#itself is only included when the curve version changes:
+#   'state': ShiftToneState
+#   'curve': (rpm, power, torque, revlimit) or None if reset, if changed
+#Listener of ShiftToneStatePublisher, called on the packet thread: publish
+#only puts the snapshot in a slot and never blocks on the pipe. A sender
+#thread sends the slot. If the GUI process stops reading and the pipe is
+#full, the sender waits and newer snapshots replace the one in the slot: only
+#the newest state is sent, a pending curve is carried over.
+class SnapshotPublisher():
+    def __init__(self, forzabeep, conn):
+        self.forzabeep = forzabeep
+        self.conn = conn
+        self.version = None #of the last state published
+        self.curve_version = None
+        self.pending = None
+        self.replaced = 0 #snapshots never sent
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='snapshots',
+                                       daemon=True)
+        self.thread.start()
+
+    #a state older than the last one published comes from a concurrent
+    #publisher and is dropped
+    def publish(self, state):
+        with self.lock:
+            if self.version is not None and state.version <= self.version:
+                return
+            self.version = state.version
+            snapshot = {'state': state}
+            if state.curve_version != self.curve_version:
+                curve = self.forzabeep.curve
+                snapshot['curve'] = None
+                if curve.is_loaded():
+                    snapshot['curve'] = (curve.rpm, curve.power, curve.torque,
+                                         curve.revlimit)
+                self.curve_version = state.curve_version
+            if self.pending is not None:
+                self.replaced += 1
+                if 'curve' in self.pending and 'curve' not in snapshot:
+                    snapshot['curve'] = self.pending['curve']
+            self.pending = snapshot
+        self.ready.set()
+
+    def run(self):
+        while self.running:
+            self.ready.wait()
+            self.ready.clear()
+            with self.lock:
+                snapshot, self.pending = self.pending, None
+            if snapshot is None:
+                continue
+            try:
+                self.conn.send(snapshot)
+            except (BrokenPipeError, EOFError, OSError):
+                break #GUI process is gone
+
+    def close(self):
+        self.running = False
+        self.ready.set()
+        self.thread.join(1)
+
+#entry point of the child process
+def run_pipeline(conn):
+    from base.main import ForzaBeep
+    forzabeep = ForzaBeep(start=False)
+    publisher = SnapshotPublisher(forzabeep, conn)
+    forzabeep.statepublisher.add_listener(publisher.publish)
+    forzabeep.publish_state()
+
+    while True:
+        try:
+            command, *args = conn.recv()
+        except (EOFError, OSError):
+            break
+        if command == 'close':
+            break
+        if command == 'toggle':
+            forzabeep.loop.toggle(*args)
+        elif command == 'reset':
+            forzabeep.reset()
+        elif command == 'set':
+            forzabeep.set_variable(*args)
+        forzabeep.publish_state()
+    forzabeep.close(writeback=False)
+    publisher.close()
+    conn.close()
+
+#GUI process side of the pipeline process
+class PipelineProcess():
+    def __init__(self):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=run_pipeline, 
+                                               args=(child_conn,), 
+                                               daemon=True, name='pipeline')
+        self.process.start()
+        child_conn.close()
+
+    def send(self, command):
+        try:
+            self.conn.send(command)
+        except (BrokenPipeError, OSError) as e:
+            print(f'Pipeline process: {e}')
+
+    #returns all snapshots received since the last poll, oldest first
+    def poll(self):
+        snapshots = []
+        try:
+            while self.conn.poll():
+                snapshots.append(self.conn.recv())
+        except (EOFError, OSError):
+            pass
+        return snapshots
+
+    def close(self, timeout=2):
+        self.send(('close',))
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:32:10 2026
+
+@author: RTB
+"""
+
+import socket
+
+#Re-emits received datagrams unchanged to other destinations, such as other
+#telemetry tools listening on another local port.
+#The socket is non-blocking: a datagram that cannot be sent right away is
+#dropped for that destination and counted as an error, it is never retried.
+class UDPRelay():
+    def __init__(self, destinations, own_port=None):
+        self.destinations = []
+        for host, port in destinations:
+            if port == own_port and host in ['', 'localhost', '127.0.0.1']:
+                print(f'Relay to {host}:{port} skipped: that is our own port')
+                continue
+            self.destinations.append((host, int(port)))
+        self.sent = {destination: 0 for destination in self.destinations}
+        self.errors = {destination: 0 for destination in self.destinations}
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+
+    def send(self, data):
+        for destination in self.destinations:
+            try:
+                self.socket.sendto(data, destination)
+                self.sent[destination] += 1
+            except OSError: #includes BlockingIOError
+                self.errors[destination] += 1
+
+    def get_status(self):
+        return '\n'.join(f'{host}:{port} {self.sent[(host, port)]} sent, '
+                         f'{self.errors[(host, port)]} errors' 
+                         for host, port in self.destinations)
+
+    def close(self):
+        self.socket.close()
@@ -10,6 +10,8 @@ from utility import Variable
 #need raw rpm and hysteresis rpm
 #GUIRPM then extends this class
 class RPM(Variable):
+    FDP_FIELDS = ['current_engine_rpm', 'engine_max_rpm']
+
     def __init__(self, hysteresis_percent):
         super().__init__(defaultvalue=0)
         self.hysteresis_percent = hysteresis_percent
@@ -5,7 +5,9 @@ Created on Wed Aug  2 21:03:42 2023
 @author: RTB
 """
 
-from utility import deloop_and_sort
+import numpy as np
+
+from utility import get_loops
 
 #collects an array of packets at full throttle
 #if the user lets go of throttle, changes gear: reset
@@ -16,9 +18,21 @@ from utility import deloop_and_sort
 #if power at the first packet is lower (or equal) to the power in the final
 #   packet, we have a power curve that is complete enough to do shift rpm
 #   rpm calculations with it.
+#The run is not copied while collecting: it is the range of rows run_start to
+#run_end in the shared TelemetryBuffer. A run longer than the buffer resets.
+#Once the run reaches revlimit it is copied out of the buffer: COLLECTED.
+#Filtering and testing it is left to the caller through test_run, as it runs
+#on the curve worker. A run is DONE when test_run returned a run.
 class RunCollector():
-    def __init__(self, config):
-        self.run = []
+    #torque is read by EngineCurve from the collected run
+    FDP_FIELDS = ['accel', 'current_engine_rpm', 'power', 'torque', 'boost',
+                  'gear']
+
+    def __init__(self, config, telemetry):
+        self.telemetry = telemetry
+        self.telemetry.add_listener(self.telemetry_reset)
+        self.run = None
+        self.run_start, self.run_end = None, None
         self.state = 'WAIT'
         self.prev_rpm = -1
         self.gear_collected = -1
@@ -28,18 +42,30 @@ class RunCollector():
         self.REMOVE_INITIAL = config.runcollector_remove_initial
         self.LOWER_LIMIT_BOOST = config.runcollector_pct_lower_limit_boost
 
-    def filter_run(self):
-        if len(self.run) > self.REMOVE_INITIAL:
-            del self.run[:self.REMOVE_INITIAL]
-        peak_boost = max([p.boost for p in self.run])
+    def get_run_length(self):
+        if self.run_start is None:
+            return 0
+        return self.run_end - self.run_start
+
+    #add the newest packet in telemetry to the run
+    def extend_run(self):
+        index = self.telemetry.get_index() - 1
+        if self.run_start is None:
+            self.run_start = index
+        self.run_end = index + 1
+
+    #returns a filtered copy of run as a structured array
+    def filter_run(self, run):
+        if len(run) > self.REMOVE_INITIAL:
+            run = run[self.REMOVE_INITIAL:]
+        boost = run['boost'].astype(np.float64)
+        peak_boost = boost.max()
         lowest_boost = peak_boost * self.LOWER_LIMIT_BOOST - 1e-3
-        while len(self.run) > 0 and self.run[0].boost < lowest_boost:
-            del self.run[0]
-        # self.run = [p for p in self.run if p.boost >= lowest_boost]
-        self.run = deloop_and_sort(array=self.run, 
-                                   key_x=lambda p: p.current_engine_rpm, 
-                                   key_y=lambda p: p.power, 
-                                   key_sort=lambda p: p.current_engine_rpm)
+        above = boost >= lowest_boost
+        run = run[np.argmax(above):] if above.any() else run[:0]
+        selectors = get_loops(x=run['current_engine_rpm'], y=run['power'])
+        run = run[selectors.astype(bool)]
+        return run[np.argsort(run['current_engine_rpm'], kind='stable')]
 
     def update(self, fdp):
         if self.state == 'WAIT':
@@ -56,8 +82,11 @@ class RunCollector():
                 return
             elif fdp.power <= 0:
                 self.state = 'MAYBE_REVLIMIT'
+            elif self.get_run_length() >= self.telemetry.maxlen:
+                self.reset() #run no longer fits in telemetry
+                return
             else:
-                self.run.append(fdp)
+                self.extend_run()
 
         if self.state == 'MAYBE_REVLIMIT':
           #  print("MAYBE_REVLIMIT")
@@ -69,7 +98,7 @@ class RunCollector():
              #   print("MAYBE_REVLIMIT RESET GEAR CHANGED")
                 self.reset() #user messed up
                 return
-            if len(self.run) == 1:
+            if self.get_run_length() == 1:
                 # print("MAYBE_REVLIMIT RESET LENGTH 1")
                 self.reset() #erronous run
                 return
@@ -78,28 +107,39 @@ class RunCollector():
 
         if self.state == 'TEST':
             # print("TEST")
-            self.filter_run()
-            # len_before = len(self.run)
-            # print(f'TEST len base {len_before} len max boost {len(self.run)}')
-            if len(self.run) < self.MINLEN:
-                # print("TEST FAILS MINLEN TEST")
-                self.reset()
-                return
-            if self.run[0].power > self.run[-1].power:
-                # print("TEST RESET RUN NOT COMPLETE")
-                self.reset() #run not clean, started too high rpm
-                return
-            self.state = 'DONE'
+            self.run = self.telemetry.window_abs(self.run_start, 
+                                                 self.run_end).copy()
+            self.state = 'COLLECTED'
 
         self.prev_rpm = fdp.current_engine_rpm
 
+    #filter the run and test if it is complete enough for a power curve
+    #returns the filtered run, or None if the run is rejected
+    #does not change state: safe to call from another thread
+    def test_run(self, run):
+        run = self.filter_run(run)
+        # print(f'TEST len max boost {len(run)}')
+        if len(run) < self.MINLEN:
+            # print("TEST FAILS MINLEN TEST")
+            return None
+        if run[0]['power'] > run[-1]['power']:
+            # print("TEST RESET RUN NOT COMPLETE")
+            return None #run not clean, started too high rpm
+        return run
+
+    #a run up to revlimit is waiting for test_run
     def is_run_completed(self):
-        return self.state == 'DONE'
+        return self.state == 'COLLECTED'
+
+    #the run passed test_run
+    def set_done(self, run):
+        self.run = run
+        self.state = 'DONE'
 
     def get_revlimit_if_done(self):
         if self.state != 'DONE':
             return None
-        return self.run[-1].current_engine_rpm
+        return float(self.run[-1]['current_engine_rpm'])
     
     def get_gear(self):
         if self.gear_collected == -1:
@@ -109,8 +149,15 @@ class RunCollector():
     def get_data(self):
         return {'run': self.run}
 
+    #the rows of a run that is being collected are gone from telemetry, a
+    #completed run is a copy and is kept
+    def telemetry_reset(self):
+        if self.run is None:
+            self.reset()
+
     def reset(self):
-        self.run = []
+        self.run = None
+        self.run_start, self.run_end = None, None
         self.state = 'WAIT'
         self.prev_rpm = -1
         self.gear_collected = -1
\ No newline at end of file
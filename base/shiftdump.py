@@ -7,30 +7,38 @@ Created on Sat Jul 20 15:15:00 2024
 
 from collections import deque
 
-#in ForzaBeep init_vars: self.shiftdump = ShiftDump(self.lookahead)
+#in ForzaBeep init_vars: 
+#    self.shiftdump = ShiftDump(self.lookahead, self.telemetry)
+#    and add self.shiftdump to the consumers in get_fdp_fields
 #in ForzaBeep loop_func funcs:  'loop_shiftdump',        #dump shift data
 #in ForzaBeep functions:
     # def loop_shiftdump(self, fdp):
     #     self.shiftdump.update(fdp)
 
 #maxlen preferred even
+#packet properties are read from the shared TelemetryBuffer when dumping,
+#the deque only holds the linear regression variables per packet
 class ShiftDump():
     fdp_props = ['current_engine_rpm', 'accel', 'clutch', 
                   'boost', 'gear', 'power']
+    FDP_FIELDS = fdp_props
     columns = ['rpm', 'throttle', 'clutch', 'boost', 
                'gear', 'power', 'slope', 'intercept', 'num']
-    def __init__(self, lookahead, maxlen=120):
+    def __init__(self, lookahead, telemetry, maxlen=120):
         self.deque = deque(maxlen=maxlen)
         
         self.counter = -1
         self.halfpoint = int(maxlen/2)
+        self.prev_gear = None
         
         self.lookahead = lookahead
+        self.telemetry = telemetry
     
-    def make_point(self, fdp):
-        data = {prop:getattr(fdp, prop) for prop in self.fdp_props}
-        data['slope'] = self.lookahead.slope
-        data['intercept'] = self.lookahead.intercept
+    #row is a row of the telemetry buffer
+    def make_point(self, row, slope, intercept):
+        data = {prop:row[prop].item() for prop in self.fdp_props}
+        data['slope'] = slope
+        data['intercept'] = intercept
         data['power'] /= 1000
         
         for key in ['slope', 'intercept']:
@@ -54,8 +62,7 @@ class ShiftDump():
     
     def update(self, fdp):
         #If gear number has increased, we have upshifted: start timer
-        if (len(self.deque) > 0 and 
-            fdp.gear > self.deque[-1]['gear']):
+        if (len(self.deque) > 0 and fdp.gear > self.prev_gear):
             self.counter = self.halfpoint
             
         #at maximum data point (gear change halfway deque), dump data and reset
@@ -65,17 +72,21 @@ class ShiftDump():
         elif self.counter > 0:
             self.counter -= 1
         
-        point = self.make_point(fdp)
-        self.deque.append(point)
+        self.deque.append((self.lookahead.slope, self.lookahead.intercept))
+        self.prev_gear = fdp.gear
 
     def header_tostring(self):
         return ''.join([f'{c:>{len(c)+2}}' for c in self.columns])
 
+    #the current packet is already in telemetry but not yet in the deque
     def dump(self):
+        rows = self.telemetry.window(len(self.deque), offset=1)
         print(self.header_tostring())
-        for i, point in enumerate(self.deque):
+        for i, (row, linreg) in enumerate(zip(rows, self.deque)):
+            point = self.make_point(row, *linreg)
             print(self.point_tostring(point), f'{i:>{3+2}}')
     
     def reset(self):
         self.deque.clear()
-        self.counter = -1
\ No newline at end of file
+        self.counter = -1
+        self.prev_gear = None
\ No newline at end of file
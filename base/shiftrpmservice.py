@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 15:31:46 2026
+
+@author: RTB
+"""
+
+from base.gear import MAXGEARS
+
+#Calculates the shift rpm of gear pairs when their input changes, instead of
+#testing all gear pairs every packet: all pairs when a curve is loaded, the
+#pairs on either side of a gear when it locks.
+#Shift rpms are cached per (curve version, relratio). Only the current curve
+#version is kept: a new curve or a reset drops the cache.
+#The gears and curve are those of owner at the time of the event: the GUI
+#replaces them after ForzaBeep.init_vars.
+class ShiftRPMService():
+    def __init__(self, owner, bus):
+        self.owner = owner
+        self.version = None
+        self.shiftrpms = {} #relratio: shift rpm of curve version
+        bus.subscribe('curve_loaded', self.curve_loaded)
+        bus.subscribe('curve_reset', self.curve_reset)
+        bus.subscribe('gear_locked', self.gear_locked)
+
+    #shiftrpms are calculated by the curve worker for this version
+    def curve_loaded(self, version, shiftrpms=None):
+        if version != self.version:
+            self.version = version
+            self.shiftrpms = {}
+        self.shiftrpms.update({} if shiftrpms is None else shiftrpms)
+        self.recompute(range(1, MAXGEARS))
+
+    def curve_reset(self, version):
+        self.version = None
+        self.shiftrpms = {}
+
+    #the pair of the gear below and the pair of the gear itself
+    def gear_locked(self, gear):
+        self.recompute([gear-1, gear])
+
+    #calculate the pairs of the given lower gears, if possible
+    def recompute(self, gears):
+        curve = self.owner.curve
+        if self.version is None or not curve.is_loaded():
+            return
+        rpm, power = curve.get_rpmpower()
+        self.owner.gears.calculate_shiftrpms(rpm, power, self.shiftrpms, gears)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 20:12:48 2026
+
+@author: RTB
+"""
+
+import threading
+from collections import namedtuple
+
+#Immutable snapshot of what ForzaBeep displays, published once per packet.
+#gears:         tuple per gear of (state, ratio, relratio, shiftrpm, variance)
+#peakpower:     (rpm, power) of the loaded curve or None
+#history:       the most recent points of the shift history
+#history_count: the number of points in the shift history, a drop means reset
+#curve_version: changes whenever the curve is loaded or reset
+#vars:          tuple of (name, value) of ForzaBeep.SETTABLE_VARS
+#packet_stats:  tuple of (name, value) of the counters of PacketStats
+ShiftToneState = namedtuple('ShiftToneState',
+                            ['version', 'rpm', 'gears', 'revlimit',
+                             'tone_offset', 'peakpower', 'car_ordinal',
+                             'history', 'history_count', 'curve_version',
+                             'vars', 'loop_state', 'loop_running',
+                             'packet_stats'])
+
+#Holds the most recent ShiftToneState. Publishing replaces the reference in
+#one assignment: readers call get without a lock and always see a complete
+#state. The lock only orders concurrent publishers, such as the packet thread
+#and a change of loop state.
+#Listeners are called with every new state on the publishing thread, after
+#the lock is released. A listener runs on the packet thread and must not
+#block: hand the state to another thread if it does I/O. With concurrent
+#publishers a listener may receive states out of order, compare version.
+class ShiftToneStatePublisher():
+    HISTORY_LEN = 10 #points of shift history included in a state
+
+    def __init__(self):
+        self.state = None
+        self.lock = threading.Lock()
+        self.listeners = []
+
+    def add_listener(self, func):
+        self.listeners.append(func)
+
+    def get(self):
+        return self.state
+
+    def publish(self, **values):
+        with self.lock:
+            version = 0 if self.state is None else self.state.version + 1
+            state = ShiftToneState(version=version, **values)
+            self.state = state
+        for listener in self.listeners:
+            listener(state)
+        return state
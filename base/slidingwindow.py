@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:12:55 2026
+
+@author: RTB
+"""
+
+import math
+import bisect
+from collections import deque
+
+#Estimators over a sliding window of the most recent maxlen values with O(1)
+#updates per value, instead of a full pass over the window per value.
+
+#Linear regression of y against x, the frame distance to the most recently
+#added value: x runs from -n+1 to 0 for a window of n values.
+#Keeps the running sums of y and of k*y, with k the absolute index of a value.
+#Adding a value and dropping the oldest only updates these sums. With x
+#shifted to the newest value both slope and intercept follow from the sums
+#and the window length. The sums are exact for integer values such as rpm.
+#For floats they are recomputed every REBASE values to limit drift, which
+#also renumbers k to keep it small.
+class SlidingLinearRegression():
+    REBASE = 1 << 16
+
+    def __init__(self, maxlen):
+        self.deque = deque(maxlen=maxlen)
+        self.clear()
+
+    def __len__(self):
+        return len(self.deque)
+
+    def add(self, y):
+        if len(self.deque) == self.deque.maxlen:
+            oldest = self.deque[0]
+            self.sum_y -= oldest
+            self.sum_ky -= (self.k - len(self.deque)) * oldest
+        self.deque.append(y)
+        self.sum_y += y
+        self.sum_ky += self.k * y
+        self.k += 1
+        if self.k >= self.REBASE:
+            self.rebase()
+
+    def rebase(self):
+        self.k = len(self.deque)
+        self.sum_y = math.fsum(self.deque)
+        self.sum_ky = math.fsum(k*y for k, y in enumerate(self.deque))
+        if all(type(y) is int for y in self.deque):
+            self.sum_y, self.sum_ky = int(self.sum_y), int(self.sum_ky)
+
+    #returns (slope, intercept) with the intercept at the newest value
+    #sum of (x - mean x)^2 is n(n^2-1)/12 and mean x is -(n-1)/2
+    def get(self):
+        n = len(self.deque)
+        if n < 2:
+            return None, None
+        sum_xy = self.sum_ky - (self.k - 1) * self.sum_y
+        slope = 6 * (2*sum_xy + (n-1)*self.sum_y) / (n * (n*n - 1))
+        intercept = self.sum_y / n + slope * ((n-1) / 2)
+        return slope, intercept
+
+    def clear(self):
+        self.deque.clear()
+        self.k = 0 #absolute index of the next value
+        self.sum_y, self.sum_ky = 0, 0
+
+#Median and sample variance of the window. The median comes from a sorted
+#copy of the window kept up to date with bisect: O(log n) search plus a small
+#memmove per value. The variance uses Welford's update for adding a value and
+#its inverse for dropping the oldest one. Mean and sum of squared deviations
+#are recomputed with a two-pass sum every REBASE values to limit drift.
+class SlidingWindowStats():
+    REBASE = 1024
+
+    def __init__(self, maxlen):
+        self.deque = deque(maxlen=maxlen)
+        self.clear()
+
+    def __len__(self):
+        return len(self.deque)
+
+    def add(self, value):
+        if len(self.deque) == self.deque.maxlen:
+            self.remove_oldest()
+        self.deque.append(value)
+        bisect.insort(self.sorted, value)
+        delta = value - self.mean
+        self.mean += delta / len(self.deque)
+        self.m2 += delta * (value - self.mean)
+        self.updates += 1
+        if self.updates >= self.REBASE:
+            self.rebase()
+
+    def remove_oldest(self):
+        value = self.deque.popleft()
+        del self.sorted[bisect.bisect_left(self.sorted, value)]
+        n = len(self.deque)
+        if n == 0:
+            self.mean, self.m2 = 0.0, 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / n
+        self.m2 -= delta * (value - self.mean)
+
+    def rebase(self):
+        n = len(self.deque)
+        self.mean = math.fsum(self.deque) / n
+        self.m2 = math.fsum((x - self.mean)**2 for x in self.deque)
+        self.updates = 0
+
+    #same definition as statistics.median
+    def median(self):
+        n = len(self.sorted)
+        i = n // 2
+        if n % 2 == 1:
+            return self.sorted[i]
+        return (self.sorted[i - 1] + self.sorted[i]) / 2
+
+    #sample variance, as statistics.variance
+    def variance(self):
+        n = len(self.deque)
+        if n < 2:
+            return math.inf
+        return max(self.m2, 0.0) / (n - 1)
+
+    def clear(self):
+        self.deque.clear()
+        self.sorted = []
+        self.mean, self.m2 = 0.0, 0.0
+        self.updates = 0
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 24 17:36:52 2026
+
+@author: RTB
+"""
+
+import os
+import sys
+import threading
+from time import perf_counter, perf_counter_ns
+from collections import namedtuple
+
+from base.eventlog import eventlog
+
+#A stage of the pipeline, declared by its owner:
+#name:   method of the owner called with the packet
+#active: method of the owner that returns if the stage has work to do, or
+#        None for a stage that always runs
+#inputs: events that can change the outcome of active, see notify
+Stage = namedtuple('Stage', ['name', 'active', 'inputs'],
+                   defaults=[None, ()])
+
+#The stages of ForzaBeep.loop_func compiled once into lists of bound methods
+#of owner: one for the newest packet and one for outdated packets, in which
+#stages are replaced by substitutes (see ForzaBeep.OUTDATED_STAGES).
+#Only active stages are in the lists. A stage that has nothing left to do,
+#such as the datacollector once a curve is loaded, drops out until an event
+#in its inputs makes it active again. The lists are replaced as a whole, a
+#change takes effect from the next packet.
+#run is replaced as a whole when instrumentation is switched: with profiling
+#and capture off, a packet costs a loop over bound methods and nothing else.
+#An exception in a stage is logged and the next stage runs.
+class StagePipeline():
+    def __init__(self, owner, stages, substitutes=None, latency=None):
+        substitutes = {} if substitutes is None else substitutes
+        self.stages = [Stage(stage) if isinstance(stage, str) else stage
+                       for stage in stages]
+        self.names = [stage.name for stage in self.stages]
+        self.funcs = {stage.name: (getattr(owner, stage.name),
+                                   getattr(owner, substitutes.get(stage.name,
+                                                                  stage.name)))
+                      for stage in self.stages}
+        self.predicates = {stage.name: getattr(owner, stage.active)
+                           for stage in self.stages
+                           if stage.active is not None}
+        self.lock = threading.Lock() #reset may come from another thread
+        self.active = set(self.names)
+        self.compile()
+        self.refresh()
+        self.latency = latency
+        self.profile = None
+        self.capture = None
+        self.writer = None #thread writing the last capture
+        self.select_run()
+
+    #evaluate the active predicate of every stage
+    def refresh(self):
+        self.evaluate(self.predicates)
+
+    #evaluate the stages that have event as input
+    def notify(self, event):
+        self.evaluate([stage.name for stage in self.stages
+                       if event in stage.inputs and stage.active is not None])
+
+    #notify on every event of a bus that is an input of a stage
+    def subscribe(self, bus):
+        events = {event for stage in self.stages for event in stage.inputs}
+        for event in sorted(events):
+            bus.subscribe(event, 
+                          lambda event=event, **values: self.notify(event))
+
+    def evaluate(self, names):
+        with self.lock:
+            active = set(self.active)
+            for name in names:
+                if self.predicates[name]():
+                    active.add(name)
+                else:
+                    active.discard(name)
+            if active != self.active:
+                self.active = active
+                self.compile()
+
+    def compile(self):
+        self.newest = [(name, self.funcs[name][0]) for name in self.names
+                       if name in self.active]
+        self.outdated = [(name, self.funcs[name][1]) for name in self.names
+                         if name in self.active]
+
+    def is_active(self, name):
+        return name in self.active
+
+    #run is called for every packet. Pick the variant for the current
+    #instrumentation: capture, then profiling, then latency probes. Profile
+    #and latency probes are not updated during a capture
+    def select_run(self):
+        if self.capture is not None:
+            self.run = self.run_capture
+        elif self.profile is not None:
+            self.run = self.run_profiled
+        elif self.latency is not None:
+            self.run = self.run_latency
+        else:
+            self.run = self.run_plain
+
+    def run_plain(self, fdp, newest=True):
+        for name, func in (self.newest if newest else self.outdated):
+            try:
+                func(fdp)
+            except BaseException as e:
+                eventlog.error('stage_error', '{stage} {error}',
+                               stage=name, error=e)
+
+    def run_latency(self, fdp, newest=True):
+        latency = self.latency
+        for name, func in (self.newest if newest else self.outdated):
+            start = perf_counter()
+            try:
+                func(fdp)
+            except BaseException as e:
+                eventlog.error('stage_error', '{stage} {error}',
+                               stage=name, error=e)
+            latency.record_since(name, start)
+
+    def run_profiled(self, fdp, newest=True):
+        profile = self.profile
+        latency = self.latency
+        for name, func in (self.newest if newest else self.outdated):
+            start = perf_counter_ns()
+            try:
+                func(fdp)
+            except BaseException as e:
+                profile.add_exception(name)
+                eventlog.error('stage_error', '{stage} {error}',
+                               stage=name, error=e)
+            elapsed = perf_counter_ns() - start
+            profile.add(name, elapsed)
+            if latency is not None:
+                latency.record(name, elapsed / 1e9)
+
+    #the profiler is active only while the stages run: time spent waiting
+    #for packets is not part of the capture. The stages are called from this
+    #frame, which the profiler does not see: each stage is a root.
+    #A finished capture is written on a thread of its own, not the packet
+    #thread
+    def run_capture(self, fdp, newest=True):
+        capture = self.capture
+        sys.setprofile(capture.callback)
+        try:
+            for name, func in (self.newest if newest else self.outdated):
+                try:
+                    func(fdp)
+                except BaseException as e:
+                    eventlog.error('stage_error', '{stage} {error}',
+                                   stage=name, error=e)
+        finally:
+            sys.setprofile(None)
+        capture.end_packet()
+        if capture.is_done():
+            self.capture = None
+            self.select_run()
+            self.writer = threading.Thread(target=self.write_capture,
+                                           args=(capture,), name='capture',
+                                           daemon=True)
+            self.writer.start()
+
+    def write_capture(self, capture):
+        try:
+            filename = capture.write()
+        except OSError as e:
+            eventlog.error('profile_capture_error',
+                           'Capture not written: {error}', error=e)
+            return
+        eventlog.info('profile_capture',
+                      'Captured {packets} packets to {filename}',
+                      packets=capture.packets, filename=filename)
+
+    #per stage call counts, cumulative time and exceptions. Enabling keeps
+    #the counts collected so far
+    def set_profiling(self, enabled):
+        if enabled and self.profile is None:
+            self.profile = StageProfile(self.names)
+        elif not enabled:
+            self.profile = None
+        self.select_run()
+
+    def get_profile(self):
+        return self.profile
+
+    #profile the call stacks of the stages of every packet for seconds of
+    #packets and write them to filename as folded stacks, see StackCapture.
+    #Starts with the next packet, on the packet thread
+    def start_capture(self, seconds, filename):
+        self.capture = StackCapture(seconds, filename)
+        self.select_run()
+
+    def is_capturing(self):
+        return self.capture is not None
+
+    #wait for a capture that is being written
+    def close(self):
+        if self.writer is not None:
+            self.writer.join()
+
+#counters per stage, written by the packet thread only
+class StageProfile():
+    def __init__(self, names):
+        self.calls = dict.fromkeys(names, 0)
+        self.time_ns = dict.fromkeys(names, 0)
+        self.exceptions = dict.fromkeys(names, 0)
+
+    def add(self, name, elapsed):
+        self.calls[name] += 1
+        self.time_ns[name] += elapsed
+
+    def add_exception(self, name):
+        self.exceptions[name] += 1
+
+    def reset(self):
+        for counter in [self.calls, self.time_ns, self.exceptions]:
+            for name in counter:
+                counter[name] = 0
+
+    def dump(self):
+        lines = [f'{"stage":<26}{"calls":>8}{"total ms":>10}{"mean us":>9}'
+                 f'{"errors":>8}']
+        for name, calls in self.calls.items():
+            time_ns = self.time_ns[name]
+            mean = time_ns / calls / 1000 if calls else 0
+            lines.append(f'{name:<26}{calls:>8}{time_ns/1e6:>10.1f}'
+                         f'{mean:>9.1f}{self.exceptions[name]:>8}')
+        return '\n'.join(lines)
+
+#Deterministic call stack profile through sys.setprofile, for the thread that
+#installs callback. Self time in ns is added per stack of function names.
+#write produces the folded stack format read by flamegraph.pl, speedscope
+#and inferno: a line per stack of 'outer;inner;innermost microseconds'.
+#The stack is cleared after every packet: a stage is a root of the graph.
+class StackCapture():
+    def __init__(self, seconds, filename):
+        self.seconds = seconds
+        self.filename = filename
+        self.start = None
+        self.packets = 0
+        self.folded = {} #tuple of labels: self time in ns
+        self.labels = [] #current stack
+        self.frames = [] #per label: [start ns, time in children ns]
+
+    def callback(self, frame, event, arg):
+        now = perf_counter_ns()
+        if event == 'call':
+            code = frame.f_code
+            self.labels.append(f'{code.co_name} '
+                               f'({os.path.basename(code.co_filename)}:'
+                               f'{code.co_firstlineno})')
+            self.frames.append([now, 0])
+        elif event == 'c_call':
+            name = getattr(arg, '__qualname__', None) or repr(arg)
+            module = getattr(arg, '__module__', None)
+            self.labels.append(name if module is None else f'{module}.{name}')
+            self.frames.append([now, 0])
+        elif self.frames: #return, c_return, c_exception
+            start, children = self.frames.pop()
+            elapsed = now - start
+            stack = tuple(self.labels)
+            self.labels.pop()
+            self.folded[stack] = (self.folded.get(stack, 0) +
+                                  elapsed - children)
+            if self.frames:
+                self.frames[-1][1] += elapsed
+
+    #the call to sys.setprofile(None) leaves its own c_call on the stack
+    def end_packet(self):
+        self.labels.clear()
+        self.frames.clear()
+        self.packets += 1
+        if self.start is None:
+            self.start = perf_counter()
+
+    def is_done(self):
+        return perf_counter() - self.start >= self.seconds
+
+    def write(self):
+        with open(self.filename, 'w', encoding='utf-8') as file:
+            for stack, time_ns in self.folded.items():
+                if (us := round(time_ns / 1000)) > 0:
+                    file.write(';'.join(label.replace(';', ':')
+                                        for label in stack) + f' {us}\n')
+        return self.filename
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 14:21:08 2026
+
+@author: RTB
+"""
+
+from operator import attrgetter
+
+import numpy as np
+
+from base.fdp import ForzaDataPacket, ForzaDataPacketDecoder
+
+#numpy type per struct character used in the packet formats
+DTYPES = {'f': np.float32, 'i': np.int32, 'I': np.uint32,
+          'H': np.uint16,  'B': np.uint8, 'b': np.int8}
+
+#struct character per packet property, fh4/fh5/fm8 use the dash layout
+FIELD_TYPES = dict(zip(ForzaDataPacket.get_props('dash'),
+                       ForzaDataPacketDecoder.split_format(
+                                            ForzaDataPacket.dash_format)))
+
+#Preallocated columnar ring buffer of packets shared by the consumers of the
+#packet history: a numpy structured array with a typed column per property.
+#The columns are taken from the first packet appended: a projected record
+#only has the properties the pipeline reads.
+#Every row is written twice, at i and at i+maxlen. Any window of at most
+#maxlen consecutive rows is then a contiguous slice: a view, not a copy.
+#Rows are addressed by absolute index: the number of packets appended before
+#it. The buffer is never cleared, consumers keep their own start index.
+#If the packet format changes, the columns are created again and the count
+#starts at zero: listeners are called to drop the indexes they keep.
+class TelemetryBuffer():
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self.count = 0
+        self.packet_format = None
+        self.data = None
+        self.listeners = []
+
+    #listener is called without arguments when the columns are re-created
+    def add_listener(self, func):
+        self.listeners.append(func)
+
+    #(re)create the columns for the properties of this packet format
+    def init_columns(self, fdp):
+        if self.data is not None:
+            self.count = 0
+            for listener in self.listeners:
+                listener()
+        props = fdp.get_props(fdp.packet_format)
+        self.fields = [p for p in props if p in FIELD_TYPES]
+        dtype = [(p, DTYPES[FIELD_TYPES[p]]) for p in self.fields]
+        self.data = np.zeros(2*self.maxlen, dtype=dtype)
+        self.getter = attrgetter(*self.fields)
+        self.packet_format = fdp.packet_format
+        #a record holding exactly the columns can be assigned as is
+        self.as_row = (len(self.fields) == len(props) and 
+                       isinstance(fdp, tuple))
+
+    def append(self, fdp):
+        if fdp.packet_format != self.packet_format:
+            self.init_columns(fdp)
+        row = fdp if self.as_row else self.getter(fdp)
+        i = self.count % self.maxlen
+        self.data[i] = row
+        self.data[i+self.maxlen] = row
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.maxlen)
+
+    #absolute index of the next packet to be appended
+    def get_index(self):
+        return self.count
+
+    def is_available(self, start):
+        return self.count - self.maxlen <= start
+
+    #view of rows with absolute index start up to but excluding end
+    def window_abs(self, start, end):
+        assert (self.is_available(start) and start <= end <= self.count), \
+            f'TelemetryBuffer: rows {start}-{end} not available'
+        i = start % self.maxlen
+        return self.data[i:i+end-start]
+
+    #view of the most recent n rows, excluding the newest offset rows
+    def window(self, n, offset=0):
+        end = self.count - offset
+        return self.window_abs(end - n, end)
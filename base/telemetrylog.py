@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:37:52 2026
+
+@author: RTB
+"""
+
+import time
+from struct import Struct
+
+#Binary log of raw Data Out datagrams as received.
+#The header is a magic string and the wall clock time the recording started.
+#Each record is the receive time in seconds since the start of the recording,
+#the length of the datagram and the datagram itself. Little endian.
+HEADER = Struct('<8sd')
+RECORD = Struct('<dH')
+MAGIC = b'FSTLOG01'
+
+#writes datagrams to a log, called from the packet thread
+class TelemetryRecorder():
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'wb')
+        self.file.write(HEADER.pack(MAGIC, time.time()))
+        self.start = time.perf_counter()
+        self.count = 0
+
+    #recv_time is a time.perf_counter value, defaults to now
+    def write(self, data, recv_time=None):
+        if recv_time is None:
+            recv_time = time.perf_counter()
+        self.file.write(RECORD.pack(recv_time - self.start, len(data)))
+        self.file.write(data)
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+#generator of (receive time, datagram) from a log
+def read_telemetry_log(filename):
+    with open(filename, 'rb') as file:
+        magic, _ = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f'{filename} is not a telemetry log')
+        while len(record := file.read(RECORD.size)) == RECORD.size:
+            recv_time, length = RECORD.unpack(record)
+            data = file.read(length)
+            if len(data) < length:
+                break #truncated final record, recording was interrupted
+            yield recv_time, data
+
+#feeds a log to a decode function and a loop function, such as the decode
+#function of ForzaUDPLoop and ForzaBeep.loop_func
+#speed is a multiplier of the recorded timing, 0 replays as fast as possible
+#after_func is called after every packet if not None
+class TelemetryReplayer():
+    def __init__(self, filename, speed=1.0):
+        self.filename = filename
+        self.speed = speed
+
+        self.count = 0
+        self.duration = 0
+
+    def run(self, decode, loop_func, after_func=None, latency=None):
+        self.count = 0
+        start = time.perf_counter()
+        for recv_time, data in read_telemetry_log(self.filename):
+            if self.speed:
+                delay = start + recv_time / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if latency is not None:
+                latency.set_recv_time()
+            fdp = decode(data)
+            if fdp is not None:
+                loop_func(fdp)
+            if after_func is not None:
+                after_func()
+            self.count += 1
+        self.duration = time.perf_counter() - start
+        return self.count, self.duration
+
+    #throughput of the full pipeline in the last run
+    def get_packets_per_second(self):
+        if self.duration == 0:
+            return 0
+        return self.count / self.duration
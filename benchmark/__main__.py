@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:12:09 2026
+
+@author: RTB
+"""
+
+#python -m benchmark runs the benchmark suite, see benchmark.suite
+from benchmark.suite import main
+
+main()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:20:44 2026
+
+@author: RTB
+"""
+
+#Compares the vectorised get_loops with the previous nested loop version on
+#synthetic runs of 200 to 5000 points: identical selectors and time per run
+#Run from the repository root: python -m benchmark.deloop
+
+import timeit
+import itertools as it
+
+import numpy as np
+
+from utility import intersection, get_loops
+
+#previous implementation of get_loops, kept as reference
+def reference_get_loops(x, y, max_loop=50):
+    ind = list(it.repeat(1, len(x)))
+    i = 0
+    while i < len(x) - 2:
+        for j in range(i + 2, min(len(x) - 2, i + max_loop)):
+            if intersection(x[i],x[i+1],x[j],x[j+1], y[i],y[i+1],y[j],y[j+1]):
+                ind[i+1:j+1] = it.repeat(0, j-i)
+                i = j #skip ahead
+                break
+        else:
+            i += 1
+    return ind
+
+#rpm/power points of a full throttle run with noise and an oscillation every
+#~100 points that makes the curve intersect with itself, float32 values as
+#in telemetry
+def synthetic_run(length, seed=0):
+    rnd = np.random.default_rng(seed)
+    rpm = np.linspace(2000, 8000, length)
+    step = rpm[1] - rpm[0]
+    rpm += rnd.normal(0, 0.2*step, length)
+    for start in range(50, length-10, 100):
+        rpm[start:start+6] -= 3*step*np.sin(np.linspace(0, np.pi, 6))
+    power = 300*np.sin(np.pi*rpm/9000) + rnd.normal(0, 0.5, length)
+    power[::100] += 5
+    return rpm.astype(np.float32).tolist(), power.astype(np.float32).tolist()
+
+def time_ms(func, repeat=3):
+    return 1e3 * min(timeit.Timer(func).repeat(repeat=repeat, number=1))
+
+def run(lengths=(200, 500, 1000, 2000, 5000)):
+    results = {}
+    for length in lengths:
+        x, y = synthetic_run(length, seed=length)
+        expected = reference_get_loops(x, y)
+        result = get_loops(x, y)
+        assert list(result) == expected, f'selectors differ for {length}'
+        results[length] = (time_ms(lambda: reference_get_loops(x, y)),
+                           time_ms(lambda: get_loops(x, y)),
+                           len(expected) - sum(expected))
+    return results
+
+def main():
+    print(f'{"points":>7} {"reference ms":>13} {"vectorised ms":>14} {"removed":>8}')
+    for length, (reference, vectorised, removed) in run().items():
+        print(f'{length:>7} {reference:13.2f} {vectorised:14.2f} {removed:8}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 11:02:41 2026
+
+@author: RTB
+"""
+
+#Micro-benchmark of ForzaDataPacket versus ForzaDataPacketDecoder
+#Run from the repository root: python -m benchmark.fdp
+#Packets are synthetic: random values packed with the format string of each
+#packet format, so every field is decoded with a known value.
+
+import re
+import sys
+import random
+import timeit
+import tracemalloc
+from struct import pack
+
+from base.fdp import ForzaDataPacket, ForzaDataPacketDecoder
+
+FORMATS = ['sled', 'dash', 'fh4', 'fh5', 'fm8']
+
+#packet properties read by the pipeline, as returned by
+#ForzaBeep.get_fdp_fields. Hardcoded to keep this independent of base.main
+PIPELINE_FIELDS = ['accel', 'boost', 'car_ordinal', 'car_performance_index',
+                   'clutch', 'current_engine_rpm', 'drivetrain_type',
+                   'engine_idle_rpm', 'engine_max_rpm', 'gear', 'is_race_on',
+                   'power', 'speed', 'torque', 'wheel_rotation_speed_FL',
+                   'wheel_rotation_speed_FR', 'wheel_rotation_speed_RL',
+                   'wheel_rotation_speed_RR']
+
+#random value per struct type character, pad bytes are skipped
+RANDOM_VALUE = {'f': lambda: random.uniform(-1e4, 1e4),
+                'i': lambda: random.randint(0, 1e5),
+                'I': lambda: random.randint(0, 2**32-1),
+                'H': lambda: random.randint(0, 2**16-1),
+                'B': lambda: random.randint(0, 255),
+                'b': lambda: random.randint(-128, 127)}
+
+def random_packet(packet_format):
+    fmt = getattr(ForzaDataPacket, f'{packet_format}_format')
+    values = []
+    for count, char in re.findall(r'(\d*)([a-zA-Z])', fmt[1:]):
+        if char != 'x':
+            values.extend(RANDOM_VALUE[char]() for _ in range(int(count or 1)))
+    return pack(fmt, *values)
+
+def random_packets(packet_format, count=1000):
+    return [random_packet(packet_format) for _ in range(count)]
+
+#decoders must return the same value for every property they decode
+def verify(packets, packet_format, fields=None):
+    decoder = ForzaDataPacketDecoder(packet_format, fields)
+    for data in packets:
+        fdp = ForzaDataPacket(data, packet_format)
+        record = decoder.decode(data)
+        for prop in record.get_props():
+            assert getattr(fdp, prop) == getattr(record, prop), prop
+
+#bytes held by n decoded packets, as a deque of packets would keep alive
+def retained_bytes(decode, packets):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [decode(data) for data in packets]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(s.size_diff for s in after.compare_to(before, 'filename'))
+    return size / len(kept)
+
+def run(count=2000, repeat=5):
+    results = {}
+    for packet_format in FORMATS:
+        packets = random_packets(packet_format, count)
+        verify(packets, packet_format)
+        verify(packets, packet_format, PIPELINE_FIELDS)
+
+        decoder = ForzaDataPacketDecoder(packet_format)
+        projected = ForzaDataPacketDecoder(packet_format, PIPELINE_FIELDS)
+        candidates = {
+            'ForzaDataPacket': lambda d: ForzaDataPacket(d, packet_format),
+            'ForzaDataPacketDecoder': decoder.decode,
+            'projected': projected.decode }
+        for name, decode in candidates.items():
+            timer = timeit.Timer(lambda: [decode(d) for d in packets])
+            best = min(timer.repeat(repeat=repeat, number=1))
+            results[(packet_format, name)] = (1e6*best/count,
+                                              retained_bytes(decode, packets))
+    return results
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f'{"format":>6} {"decoder":>24} {"us/packet":>10} {"bytes/packet":>13}')
+    for (packet_format, name), (us, size) in run(count).items():
+        print(f'{packet_format:>6} {name:>24} {us:10.2f} {size:13.0f}')
+
+if __name__ == "__main__":
+    main()
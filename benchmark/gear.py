@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:34:02 2026
+
+@author: RTB
+"""
+
+#Replays synthetic sessions through Gears with the previous implementation of
+#Gear.update (statistics.median and statistics.variance over the deque) and
+#the current one, and checks both lock every gear at the same packet with the
+#same ratio. Reports the per-packet cost of Gears.update for both.
+#Run from the repository root: python -m benchmark.gear
+
+import sys
+import statistics
+import timeit
+from collections import deque
+
+from config import config
+from base.fdp import ForzaDataPacketDecoder
+from base.gear import Gear, Gears
+from base.eventlog import eventlog
+from utility import derive_gearratio
+
+from benchmark.session import synthetic_session
+
+#previous implementation of Gear.update, kept as reference
+class StatisticsGear(Gear):
+    def __init__(self, number, config):
+        super().__init__(number, config)
+        self.ratio_deque = deque(maxlen=self.DEQUE_LEN)
+
+    def reset(self):
+        super().reset()
+        self.ratio_deque.clear()
+
+    def update(self, fdp):
+        if self.state.at_initial():
+            self.to_next_state()
+        if self.state.at_least_locked():
+            return
+        if not (ratio := derive_gearratio(fdp)):
+            return
+        self.ratio_deque.append(ratio)
+        if len(self.ratio_deque) < 10:
+            return
+        median = statistics.median(self.ratio_deque)
+        variance = statistics.variance(self.ratio_deque)
+        self.set_ratio(median)
+        self.set_variance(variance)
+        if (self.variance < self.VAR_BOUNDS[fdp.drivetrain_type] and
+                len(self.ratio_deque) >= self.DEQUE_MIN):
+            self.to_next_state()
+            return True
+
+class StatisticsGears(Gears):
+    def __init__(self, config):
+        self.gears = [None] + [StatisticsGear(g, config)
+                                                     for g in self.GEARLIST]
+
+#returns a list of (packet index, gear, ratio) for every gear lock
+def lock_points(gears, packets):
+    locks = []
+    for i, fdp in enumerate(packets):
+        if fdp.clutch > 0 or not gears.is_valid(fdp):
+            continue
+        if gears.update(fdp):
+            gear = int(fdp.gear)
+            locks.append((i, gear, gears.gears[gear].get_ratio()))
+    return locks
+
+#sessions with increasing noise on wheel speed: from clean locks to gears
+#that lock late or never
+def sessions(count=12):
+    decoder = ForzaDataPacketDecoder()
+    for seed in range(count):
+        noise = 2.5e-4 * (1 + seed % 6)
+        drivetrain_type = seed % 3
+        packets = synthetic_session('fm8', seed=seed, noise=noise,
+                                    drivetrain_type=drivetrain_type)
+        yield [decoder.decode(data) for data in packets]
+
+#returns the number of gear locks found in all sessions
+def verify(all_packets):
+    total = 0
+    for packets in all_packets:
+        expected = lock_points(StatisticsGears(config), packets)
+        result = lock_points(Gears(config), packets)
+        assert expected == result, (expected, result)
+        total += len(result)
+    return total
+
+def per_packet_us(gears_class, all_packets, repeat=3):
+    def run():
+        for packets in all_packets:
+            lock_points(gears_class(config), packets)
+    best = min(timeit.Timer(run).repeat(repeat=repeat, number=1))
+    return 1e6 * best / sum(len(packets) for packets in all_packets)
+
+def run(count=12):
+    all_packets = list(sessions(count))
+    locks = verify(all_packets)
+    print(f'{count} sessions, {locks} identical gear locks')
+    return {cls.__name__: per_packet_us(cls, all_packets)
+            for cls in [StatisticsGears, Gears]}
+
+def main():
+    eventlog.console = False #discard the LOCKED messages of Gear
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    for name, us in run(count).items():
+        print(f'{name:>16} {us:8.2f} us/packet')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:40:17 2026
+
+@author: RTB
+"""
+
+#Per-packet cost of the Lookahead linear regression: the previous full pass
+#with statistics.linear_regression versus SlidingLinearRegression
+#Run from the repository root: python -m benchmark.lookahead
+
+import sys
+import math
+import random
+import statistics
+import timeit
+from collections import deque
+
+from config import config
+from base.lookahead import Lookahead
+from base.slidingwindow import SlidingLinearRegression
+
+#previous implementation of Lookahead.add, kept as reference
+class StatisticsLookahead(Lookahead):
+    def __init__(self, config):
+        super().__init__(config)
+        self.deque = deque(maxlen=config.linreg_len_max)
+
+    def add(self, rpm):
+        self.deque.append(rpm)
+        if len(self.deque) < self.minlen:
+            return
+        x, y = range(-len(self.deque)+1, 1), self.deque
+        self.slope, self.intercept = statistics.linear_regression(x, y)
+
+#integer rpm values as passed by ForzaBeep, with accelerating sections
+def random_rpm(count, seed=0):
+    rnd = random.Random(seed)
+    rpm, values = 3000, []
+    for _ in range(count):
+        rpm = max(800, min(9000, rpm + rnd.randint(-40, 60)))
+        values.append(rpm)
+    return values
+
+def verify(values, rel_tol=1e-9, abs_tol=1e-6):
+    reference, lookahead = StatisticsLookahead(config), Lookahead(config)
+    for rpm in values:
+        reference.add(rpm)
+        lookahead.add(rpm)
+        for name in ['slope', 'intercept']:
+            a, b = getattr(reference, name), getattr(lookahead, name)
+            assert (a is None and b is None) or math.isclose(
+                a, b, rel_tol=rel_tol, abs_tol=abs_tol), (name, a, b)
+
+#floats with a small REBASE to test the recomputation of the sums
+def verify_rebase(count=5000):
+    class Rebasing(SlidingLinearRegression):
+        REBASE = 97
+    rnd = random.Random(1)
+    linreg, window = Rebasing(maxlen=20), deque(maxlen=20)
+    for _ in range(count):
+        y = rnd.uniform(0, 1e4)
+        linreg.add(y)
+        window.append(y)
+        if len(window) >= 2:
+            x = range(-len(window)+1, 1)
+            for a, b in zip(statistics.linear_regression(x, window),
+                            linreg.get()):
+                assert math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6), (a, b)
+
+def per_packet_us(lookahead_class, values, repeat=5):
+    def run():
+        lookahead = lookahead_class(config)
+        for rpm in values:
+            lookahead.add(rpm)
+    best = min(timeit.Timer(run).repeat(repeat=repeat, number=1))
+    return 1e6 * best / len(values)
+
+def run(count=20000):
+    values = random_rpm(count)
+    verify(values)
+    verify_rebase()
+    return {cls.__name__: per_packet_us(cls, values)
+            for cls in [StatisticsLookahead, Lookahead]}
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for name, us in run(count).items():
+        print(f'{name:>20} {us:8.2f} us/packet')
+
+if __name__ == "__main__":
+    main()
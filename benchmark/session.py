@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:11:47 2026
+
+@author: RTB
+"""
+
+#Synthetic driving session as raw packets in any of the packet formats.
+#A six speed car with a known torque curve:
+#   cruise in every gear at constant rpm with noise on wheel speed
+#   a full throttle run in 3rd gear up to the rev limiter
+#   several laps of full throttle acceleration with upshifts through all gears
+#This exercises gear locking, curve collection, shift rpm calculation, beeps
+#and the shift history in ForzaBeep.
+
+import math
+import random
+from struct import pack
+
+from base.fdp import ForzaDataPacket
+
+RATIOS = [3.6, 2.5, 1.9, 1.5, 1.22, 1.0]
+FINAL_DRIVE = 3.7
+WHEEL_RADIUS = 0.33 #m
+IDLE_RPM, MAX_RPM, REVLIMIT = 900, 8000, 7600
+
+def torque_at(rpm):
+    return max(50.0, 420 - ((rpm-4800)/3200)**2*220)
+
+#pack a dictionary of properties into a packet, missing properties are zero
+def make_packet(packet_format, **props):
+    values = dict.fromkeys(ForzaDataPacket.get_props('dash'), 0)
+    values.update(props)
+    values = list(values.values())
+    sled_len = len(ForzaDataPacket.sled_props)
+    if packet_format == 'sled':
+        return pack(ForzaDataPacket.sled_format, *values[:sled_len])
+    if packet_format in ['fh4', 'fh5']:
+        values = values[:sled_len] + [0]*3 + values[sled_len:]
+        if packet_format == 'fh5':
+            values.append(0)
+    if packet_format == 'fm8':
+        values += [0]*5
+    return pack(getattr(ForzaDataPacket, f'{packet_format}_format'), *values)
+
+class SyntheticSession():
+    def __init__(self, packet_format='fm8', seed=1, car_ordinal=1234,
+                 drivetrain_type=1, noise=2e-4, laps=3):
+        self.packet_format = packet_format
+        self.random = random.Random(seed)
+        self.car_ordinal = car_ordinal
+        self.drivetrain_type = drivetrain_type
+        self.noise = noise
+        self.laps = laps
+        self.timestamp_ms = 0
+        self.packets = []
+
+    def emit(self, gear, rpm, accel, power=None, boost=1.0):
+        ratio = RATIOS[gear-1]*FINAL_DRIVE if 1 <= gear <= len(RATIOS) else 1
+        wheel = rpm*2*math.pi/60/ratio
+        wheel += self.random.gauss(0, wheel*self.noise)
+        torque = torque_at(rpm)*accel/255
+        if power is None:
+            power = torque*rpm*2*math.pi/60
+        self.timestamp_ms += 16 + (self.timestamp_ms % 3 == 0)
+        self.packets.append(make_packet(self.packet_format,
+            is_race_on=1, timestamp_ms=self.timestamp_ms,
+            engine_max_rpm=float(MAX_RPM), engine_idle_rpm=float(IDLE_RPM),
+            current_engine_rpm=float(rpm),
+            wheel_rotation_speed_FL=wheel, wheel_rotation_speed_FR=wheel,
+            wheel_rotation_speed_RL=wheel, wheel_rotation_speed_RR=wheel,
+            car_ordinal=self.car_ordinal, car_performance_index=700,
+            drivetrain_type=self.drivetrain_type, speed=wheel*WHEEL_RADIUS,
+            power=power, torque=torque, boost=boost, accel=accel, gear=gear))
+
+    def cruise(self, gear, rpm=3000, count=80):
+        for _ in range(count):
+            self.emit(gear, rpm + self.random.gauss(0, 3), 100)
+
+    def accelerate(self, gear, rpm, target_rpm):
+        while rpm < target_rpm:
+            self.emit(gear, rpm, 255)
+            rpm += torque_at(rpm)/RATIOS[gear-1]*0.12
+        return rpm
+
+    #a full throttle run in a single gear into the rev limiter
+    def power_run(self, gear=3, rpm=2000):
+        self.accelerate(gear, rpm, REVLIMIT)
+        for _ in range(6):
+            self.emit(gear, REVLIMIT + self.random.gauss(0, 5), 255,
+                      power=-5000.0)
+        self.emit(gear, REVLIMIT - 30, 255)
+
+    #engine braking for a packet, then neutral, then the next gear
+    def upshift(self, gear, rpm):
+        self.emit(gear, rpm, 255, power=-3000.0)
+        self.emit(11, rpm-100, 255, power=-3000.0)
+        if gear < len(RATIOS):
+            rpm = rpm*RATIOS[gear]/RATIOS[gear-1]
+            self.emit(gear+1, rpm, 255, power=-1000.0)
+        return rpm
+
+    def lap(self, number):
+        rpm = 2500.0
+        for gear in range(1, len(RATIOS)+1):
+            shift_rpm = 6600 + 200*number + self.random.uniform(-100, 100)
+            rpm = self.accelerate(gear, rpm, shift_rpm)
+            rpm = self.upshift(gear, rpm)
+        for _ in range(60):
+            self.emit(len(RATIOS), 3000, 0)
+
+    def generate(self):
+        for gear in range(1, len(RATIOS)+1):
+            self.cruise(gear)
+        self.power_run()
+        for _ in range(30):
+            self.emit(3, 4000, 0)
+        for number in range(self.laps):
+            self.lap(number)
+        return self.packets
+
+def synthetic_session(packet_format='fm8', seed=1, **kwargs):
+    return SyntheticSession(packet_format, seed, **kwargs).generate()
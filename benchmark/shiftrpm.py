@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 19:47:13 2026
+
+@author: RTB
+"""
+
+#Checks solve_shiftrpms against the shift rpms the intersect package gave for
+#synthetic noisy power curves resampled per 100 rpm, recorded in
+#shiftrpm_reference.json, and against a flat top. Times it against
+#reference_shiftrpm, a reimplementation of the segment pair intersection of
+#the intersect package, for all gear pairs.
+#Run from the repository root: python -m benchmark.shiftrpm
+#--record rewrites the recorded shift rpms, this needs the intersect package,
+#which is no longer a requirement
+
+import os
+import json
+import timeit
+import argparse
+
+import numpy as np
+
+from utility import solve_shiftrpms, simplify_curve
+
+RECORDED = os.path.join(os.path.dirname(__file__), 'shiftrpm_reference.json')
+REVLIMITS = (6000, 8000, 10000, 12000)
+CURVES = 50 #per revlimit
+
+#previous approach: intersect every segment of the curve with every segment
+#of the curve stretched by relratio, keep the last intersection
+def reference_shiftrpm(rpm, power, relratio):
+    x1, x2 = rpm[:-1, None], rpm[1:, None]
+    y1, y2 = power[:-1, None], power[1:, None]
+    x3, x4 = rpm[None, :-1]*relratio, rpm[None, 1:]*relratio
+    y3, y4 = power[None, :-1], power[None, 1:]
+    d = (x1-x2)*(y3-y4) - (y1-y2)*(x3-x4)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xs = ((x1*y2-y1*x2)*(x3-x4) - (x1-x2)*(x3*y4-y3*x4)) / d
+    hits = ((d != 0) &
+            (xs >= np.minimum(x1,x2)) & (xs <= np.maximum(x1,x2)) &
+            (xs >= np.minimum(x3,x4)) & (xs <= np.maximum(x3,x4)))
+    xs = xs[hits]
+    return round(xs[-1], 0) if len(xs) > 0 else rpm[-1]
+
+#power curve from idle to revlimit with noise, per 100 rpm as EngineCurve
+def synthetic_curve(revlimit, seed=0):
+    rnd = np.random.default_rng(seed)
+    rpm = np.linspace(1000, revlimit, 200)
+    power = (100*np.sin(np.pi*(rpm-1000)/(revlimit-1000)*rnd.uniform(0.6, 1))
+             + rnd.normal(0, 0.5, len(rpm)))
+    return simplify_curve(rpm, power)
+
+#relative ratios of a 7 to 10 speed gearbox
+def synthetic_relratios(seed=0):
+    rnd = np.random.default_rng(seed)
+    return np.sort(rnd.uniform(1.1, 1.6, rnd.integers(6, 10)))[::-1]
+
+def time_ms(func, repeat=5, number=20):
+    return 1e3 * min(timeit.Timer(func).repeat(repeat=repeat, 
+                                               number=number)) / number
+
+#shift rpms of the intersect package per revlimit, a list per seed
+def record():
+    import intersect
+    recorded = {}
+    for revlimit in REVLIMITS:
+        recorded[revlimit] = []
+        for seed in range(CURVES):
+            rpm, power = synthetic_curve(revlimit, seed)
+            shiftrpms = []
+            for relratio in synthetic_relratios(seed):
+                xs = intersect.intersection(rpm, power, rpm*relratio, power)[0]
+                shiftrpms.append(round(xs[-1], 0) if len(xs) > 0
+                                 else rpm[-1])
+            recorded[revlimit].append([float(x) for x in shiftrpms])
+    with open(RECORDED, 'w') as file:
+        json.dump(recorded, file, indent=1)
+
+#the curves overlap from 6000 rpm on: a single intersection at its start.
+#The intersect package found it twice
+def check_flat_top():
+    rpm = np.arange(1000, 7001, 100, dtype=np.float64)
+    power = np.minimum(rpm, 5000)
+    shiftrpms, counts = solve_shiftrpms(rpm, power, [1.2, 1.5])
+    assert list(shiftrpms) == [6000, 7000], f'flat top: {shiftrpms}'
+    assert list(counts) == [1, 0], f'flat top intersections: {counts}'
+
+def run():
+    with open(RECORDED) as file:
+        recorded = json.load(file)
+    check_flat_top()
+    results = {}
+    for revlimit in REVLIMITS:
+        for seed in range(CURVES):
+            rpm, power = synthetic_curve(revlimit, seed)
+            relratios = synthetic_relratios(seed)
+            result, _ = solve_shiftrpms(rpm, power, relratios)
+            assert list(result) == recorded[str(revlimit)][seed], (
+                f'shift rpms differ for {revlimit} seed {seed}')
+        results[revlimit] = (
+            len(rpm), len(relratios),
+            time_ms(lambda: [reference_shiftrpm(rpm, power, relratio)
+                             for relratio in relratios]),
+            time_ms(lambda: solve_shiftrpms(rpm, power, relratios)))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='shift rpm solver benchmark')
+    parser.add_argument('--record', action='store_true',
+                        help='record the shift rpms of the intersect package')
+    if parser.parse_args().record:
+        record()
+    print(f'{"revlimit":>8} {"points":>7} {"pairs":>6} {"reference ms":>13} '
+          f'{"solver ms":>10}')
+    for revlimit, (points, pairs, reference, solver) in run().items():
+        print(f'{revlimit:>8} {points:>7} {pairs:>6} {reference:13.3f} '
+              f'{solver:10.3f}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:12:09 2026
+
+@author: RTB
+"""
+
+#Benchmark suite of the headless pipeline, compared against stored baselines
+#Run from the repository root: python -m benchmark [--save] [--log FILE]
+#Per case: calls per second, per call latency (mean, p50, p99, max) and the
+#peak and retained memory of a single pass according to tracemalloc.
+#Input is the synthetic session of benchmark.session in every packet format,
+#plus any telemetry logs recorded with config.telemetry_log.
+#The GUI is never imported and sounds go to the null sink: this runs on Linux.
+#Timings are compared relative to a reference case run in the same process,
+#a pass of it before every pass of a case: a faster or slower machine, or a
+#busy one, shifts both. Regenerate the baseline with --save after adding a
+#case.
+
+import os
+import io
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from time import perf_counter_ns
+
+import numpy as np
+
+from config import config
+from base.main import ForzaBeep
+from base.fdp import ForzaDataPacket, ForzaDataPacketDecoder
+from base.gear import Gears
+from base.lookahead import Lookahead
+from base.runcollector import RunCollector
+from base.telemetrybuffer import TelemetryBuffer
+from base.enginecurve import EngineCurve
+from base.telemetrylog import read_telemetry_log
+from base.eventlog import eventlog
+from utility import deloop_and_sort, calculate_shiftrpm, solve_shiftrpms
+
+from benchmark.session import (synthetic_session, torque_at, RATIOS, 
+                               REVLIMIT)
+from benchmark.deloop import synthetic_run
+
+FORMATS = ['sled', 'dash', 'fh4', 'fh5', 'fm8']
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+#a benchmark case calls the function returned by setup once per item
+#teardown is called with that function after a pass, if not None
+class Case():
+    def __init__(self, name, items, setup, teardown=None):
+        self.name = name
+        self.items = items
+        self.setup = setup
+        self.teardown = teardown
+
+    def run_pass(self, timed=True):
+        func = self.setup()
+        latencies = np.empty(len(self.items), dtype=np.int64)
+        try:
+            for i, item in enumerate(self.items):
+                start = perf_counter_ns()
+                func(item)
+                latencies[i] = perf_counter_ns() - start
+        finally:
+            if self.teardown is not None:
+                self.teardown(func)
+        return latencies
+
+    #the pass with the lowest total is reported, allocations are traced in a
+    #separate pass as tracing slows down every allocation.
+    #If reference is given, each pass follows a pass of reference. relative
+    #is the median over passes of the ratio of the median of a pass to that
+    #of its reference pass: a machine that is slower for a while slows down
+    #both.
+    def measure(self, repeat, reference=None):
+        passes, ratios = [], []
+        for _ in range(repeat):
+            if reference is not None:
+                reference_median = np.median(reference.run_pass())
+            passes.append(self.run_pass())
+            if reference is not None:
+                ratios.append(np.median(passes[-1]) / reference_median)
+        best = min(passes, key=np.sum) / 1000 #ns -> us
+        tracemalloc.start()
+        self.run_pass()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {'calls': len(self.items),
+                'calls_per_s': len(self.items) / best.sum() * 1e6,
+                'mean_us': best.mean(),
+                'p50_us': np.percentile(best, 50),
+                'p99_us': np.percentile(best, 99),
+                'max_us': best.max(),
+                'peak_kib': peak / 1024,
+                'retained_kib': retained / 1024,
+                **({'relative': float(np.median(ratios))} if ratios else {})}
+
+#fixed mix of interpreter and small numpy work, like a pipeline stage. Every
+#case is compared relative to it, see Case.measure
+REFERENCE_X = np.linspace(0, 1000, 64)
+REFERENCE_Y = np.sin(REFERENCE_X)
+def reference_op(item):
+    total = 0
+    for i in range(200):
+        total += (i * item) % 7
+    np.interp(item, REFERENCE_X, REFERENCE_Y)
+    return total
+
+def reference_case():
+    return Case('reference', list(range(200)), lambda: reference_op)
+
+#a headless ForzaBeep that does not beep and writes curves to folder
+def headless_forzabeep(folder):
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+    EngineCurve.FOLDER = folder
+    forzabeep = ForzaBeep(start=False)
+    forzabeep.volume.set(0)
+    return forzabeep
+
+def close_forzabeep(loop_func):
+    loop_func.__self__.close(writeback=False)
+
+def pipeline_fields():
+    forzabeep = ForzaBeep(start=False)
+    forzabeep.close(writeback=False)
+    return forzabeep.get_fdp_fields()
+
+#decoding of every format, the full pipeline for formats with dash properties
+def packet_cases(name, packets, packet_format, folder):
+    fields = pipeline_fields()
+    decoder = ForzaDataPacketDecoder(packet_format, fields)
+    cases = [Case(f'decode_legacy_{name}', packets, 
+                  lambda: lambda data: ForzaDataPacket(data, packet_format)),
+             Case(f'decode_{name}', packets, 
+                  lambda: ForzaDataPacketDecoder(packet_format, 
+                                                 fields).decode)]
+    if decoder.get_packet_format(packets[0]) != 'sled':
+        records = [decoder.decode(data) for data in packets]
+        cases.append(Case(f'loop_func_{name}', records,
+                          lambda: headless_forzabeep(folder).loop_func, 
+                          close_forzabeep))
+    return cases
+
+def runcollector_update():
+    telemetry = TelemetryBuffer(config.telemetry_buffer_len)
+    collector = RunCollector(config, telemetry)
+    def update(fdp):
+        telemetry.append(fdp)
+        collector.update(fdp)
+    return update
+
+#a curve as derived by EngineCurve from the synthetic torque curve
+def synthetic_curve():
+    curve = EngineCurve(config)
+    curve.rpm = np.arange(1000, REVLIMIT + 1, 100, dtype=np.float64)
+    curve.torque = np.array([torque_at(rpm) for rpm in curve.rpm])
+    curve.power = curve.torque * curve.rpm * 2 * np.pi / 60 / 1000
+    curve.revlimit = REVLIMIT
+    curve.curve_state = True
+    return curve
+
+def component_cases(folder, count=200):
+    packets = synthetic_session('fm8')
+    records = ForzaDataPacketDecoder('fm8', pipeline_fields())
+    records = [records.decode(data) for data in packets]
+    rpms = [record.current_engine_rpm for record in records]
+
+    x, y = synthetic_run(500)
+    run = list(zip(x, y))
+    curve = synthetic_curve()
+    relratios = [r1/r2 for r1, r2 in zip(RATIOS[:-1], RATIOS[1:])]
+    filename = os.path.join(folder, 'curve.tsv')
+    curve.save(filename)
+
+    return [
+        Case('gears_update', records, lambda: Gears(config).update),
+        Case('lookahead_add', rpms, lambda: Lookahead(config).add),
+        Case('runcollector_update', records, runcollector_update),
+        Case('deloop_and_sort', [run]*(count//10),
+             lambda: lambda array: deloop_and_sort(array, lambda p: p[0],
+                                          lambda p: p[1], lambda p: p[0])),
+        Case('calculate_shiftrpm', relratios*(count//len(relratios)),
+             lambda: lambda relratio: calculate_shiftrpm(curve.rpm, 
+                                                         curve.power, 
+                                                         relratio)),
+        Case('solve_shiftrpms_all_pairs', [relratios]*(count//10),
+             lambda: lambda relratios: solve_shiftrpms(curve.rpm, curve.power,
+                                                       relratios)),
+        Case('enginecurve_save', [filename]*count, lambda: curve.save),
+        Case('enginecurve_load', [filename]*count, 
+             lambda: EngineCurve(config).load)]
+
+def get_cases(folder, logs=[], only=None):
+    cases = []
+    for packet_format in FORMATS:
+        cases += packet_cases(packet_format, synthetic_session(packet_format),
+                              packet_format, folder)
+    for filename in logs:
+        packets = [data for _, data in read_telemetry_log(filename)]
+        name = os.path.splitext(os.path.basename(filename))[0]
+        cases += packet_cases(f'log_{name}', packets, config.packet_format,
+                              folder)
+    cases += component_cases(folder)
+    if only is not None:
+        cases = [case for case in cases if only in case.name]
+    return cases
+
+#returns a list of regressions: cases slower than baseline by tolerance in
+#median per call latency relative to the reference case, which is robust to
+#the odd preempted call. Entries without 'relative' are skipped
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        if 'relative' not in baseline.get(name, {}):
+            continue
+        ratio = result['relative'] / baseline[name]['relative']
+        result['vs_baseline'] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+def report(results):
+    print(f'{"case":<24}{"calls/s":>11}{"mean":>9}{"p50":>9}{"p99":>9}'
+          f'{"max":>10}{"peak":>9}{"kept":>8}{"vs base":>9}')
+    print(f'{"":<24}{"":>11}{"us":>9}{"us":>9}{"us":>9}{"us":>10}'
+          f'{"KiB":>9}{"KiB":>8}')
+    for name, r in results.items():
+        vs_baseline = f'{r["vs_baseline"]:>8.0%}' if 'vs_baseline' in r else ''
+        print(f'{name:<24}{r["calls_per_s"]:>11.0f}{r["mean_us"]:>9.1f}'
+              f'{r["p50_us"]:>9.1f}{r["p99_us"]:>9.1f}{r["max_us"]:>10.1f}'
+              f'{r["peak_kib"]:>9.0f}{r["retained_kib"]:>8.0f} {vs_baseline}')
+
+def main():
+    parser = argparse.ArgumentParser(description='ForzaShiftTone benchmarks')
+    parser.add_argument('--log', action='append', default=[],
+                        help='telemetry log to include, may be repeated')
+    parser.add_argument('--only', help='only run cases containing this')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save', action='store_true',
+                        help='store the results as baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown of median per call latency')
+    args = parser.parse_args()
+
+    eventlog.console = False #messages of the pipeline
+    folder = tempfile.mkdtemp(prefix='fst-benchmark-')
+    results = {}
+    reference = reference_case()
+    try:
+        for case in get_cases(folder, args.log, args.only):
+            print(f'{case.name}', file=sys.stderr)
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[case.name] = case.measure(args.repeat, reference)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    regressions = compare(results, baseline, args.tolerance)
+    report(results)
+
+    if args.save:
+        baseline = results #drop cases that no longer exist
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=1)
+        print(f'Saved baseline to {args.baseline}')
+    elif regressions:
+        print(f'Regressions beyond {args.tolerance:.0%}: '
+              f'{", ".join(regressions)}')
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,41 @@ class config():
     target_ip = ''
     port = 12350
     packet_format = None
+    #decode packets with precompiled structs into compact immutable records
+    #instead of ForzaDataPacket objects
+    fast_packet_decoder = True
+    #only decode the packet properties the pipeline declares it reads
+    #requires fast_packet_decoder
+    packet_projection = True
+    #time decode, each pipeline stage and beep dispatch. Double click the
+    #connection status to view the stats, they are printed on close
+    latency_probes = False
+    latency_probes_len = 3600 #most recent samples kept per stage
+    #count calls, time and exceptions per stage of loop_func, printed on close
+    stage_profiling = False
+    #ForzaBeep.start_capture: seconds of packets and the folded stack file
+    profile_capture_seconds = 30
+    profile_capture_file = 'loop_func.folded'
+    #record received packets to this file if not None, see base.telemetrylog
+    telemetry_log = None
+    #receive with an asyncio event loop that drains all pending packets per
+    #wakeup. If the pipeline falls behind, only the newest packet of a batch
+    #is tested for a beep
+    asyncio_udp_loop = False
+    #size of the socket receive buffer in bytes, None for the OS default
+    #holds a few seconds of packets if the packet thread stalls
+    udp_receive_buffer = 1 << 20
+    #forward received packets unchanged to these [host, port] destinations
+    #example: [['127.0.0.1', 12351]]
+    relay_destinations = []
+    #fan-in of several rigs into independent sessions, see base.fanin
+    #None: sessions by source address on port, else a session per listed port
+    fanin_ports = None
+    fanin_max_sessions = 8
+    fanin_queue_len = 120 #packets queued per session before dropping
+    #run receive, decode and beep decisions in a child process, the GUI
+    #only displays snapshots. See base.pipelineprocess
+    process_isolation = False
     
     sound_file = 'audio/audiocheck.net_sin_1000Hz_-3dBFS_0.1s.wav'
     sound_files = {100:'audio/audiocheck.net_sin_1000Hz_-3dBFS_0.1s.wav',
@@ -29,11 +64,28 @@ class config():
     notification_power_count = 3
     notification_power_delay = 0.08
     
+    #generate sine tones in memory instead of playing sound_files and 
+    #notification_file. The beep is beep_tone at the gain of the volume step
+    tone_synthesis = True
+    beep_tone = {'frequency': 1000, 'duration': 0.1} #Hz, s
+    notification_tone = {'frequency': 1500, 'duration': 0.05, 'gain': -13}
+    volume_gain = {100: -3, 75: -13, 50: -23, 25: -33} #dBFS per volume step
+    #print the time from beep decision to the sound handed to the output
+    log_beep_timing = False
+    
+    #output of sounds: 'auto' (winsound if available), 'winsound', 'null' or
+    #'file' to write all sounds with their timing to audio_file
+    audio_sink = 'auto'
+    audio_file = 'audio_out.wav'
+    
     volume = 75 #default volume
     
     window_scalar = 1 #scale window by this factor
     window_x = None
     window_y = None
+    #rate at which values from the packet thread are drawn in the GUI, see
+    #gui.updatescheduler. Packets arrive at 60 hz
+    gui_update_hz = 30
     
     #initial revlimit = engine_limit - guess
     #distance between engine_limit and revlimit has not been investigated for
@@ -66,6 +118,16 @@ class config():
     log_basic_shiftdata = True
     we_beep_max = 30 #print previous packets for up to x packets after shift
     
+    #event log of the packet pipeline, see base.eventlog
+    log_level = 'INFO' #DEBUG, INFO, WARNING or ERROR
+    log_console = True
+    log_file = None #JSONL file, events are appended
+    log_rate_limit = 60 #events per second per event type, None is unlimited
+    
+    #number of recent packets kept in the shared telemetry buffer. A run for
+    #the power curve longer than this is discarded: 60 seconds at 60 hz
+    telemetry_buffer_len = 3600
+
     runcollector_minlen = 30
     runcollector_minlen_lock = 180
     #first few points are a ramp up to proper power, so they can negatively
@@ -110,6 +172,8 @@ class config():
                     v = {int(key):(value if value[:6] == 'audio/' 
                                    else f'audio/{value}')
                                                   for key, value in v.items()}
+                if k == 'volume_gain':
+                    v = {int(key):value for key, value in v.items()}
                 #update old sound location to new audio folder
                 if k == 'sound_file' and v[:6] != 'audio/':
                     v = f'audio/{v}'
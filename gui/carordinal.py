@@ -9,8 +9,9 @@ from mttkinter import mtTkinter as tkinter
 from base.carordinal import CarOrdinal
 
 class GUICarOrdinal(CarOrdinal):
-    def __init__(self, root, defaultguivalue=''):
+    def __init__(self, root, scheduler, defaultguivalue=''):
         super().__init__()
+        self.scheduler = scheduler
         self.defaultguivalue = defaultguivalue
         
         self.tkvar = tkinter.StringVar(value=defaultguivalue)
@@ -32,8 +33,9 @@ class GUICarOrdinal(CarOrdinal):
     def set(self, value):
         super().set(value)
         gui_value = value #CarData.get_name(value)
-        self.tkvar.set(gui_value)
+        self.scheduler.mark((self, 'value'), self.tkvar.set, gui_value)
         
     def reset(self):
         super().reset()
-        self.tkvar.set(self.defaultguivalue)
\ No newline at end of file
+        self.scheduler.mark((self, 'value'), self.tkvar.set, 
+                            self.defaultguivalue)
\ No newline at end of file
@@ -144,9 +144,10 @@ class GUIToneOffset(GUIConfigVariable, DynamicToneOffset):
     NAME = 'Tone offset'
     UNIT = 'ms'
 
-    def __init__(self, root, config):
+    def __init__(self, root, config, scheduler):
         LOWER, UPPER = config.tone_offset_lower, config.tone_offset_upper
         DEFAULTVALUE = config.tone_offset
+        self.scheduler = scheduler
         
         GUIConfigVariable.__init__(self, root=root, name=self.NAME, 
                          convert_from_gui=ms_to_packets, unit=self.UNIT,
@@ -159,6 +160,10 @@ class GUIToneOffset(GUIConfigVariable, DynamicToneOffset):
                                                                   columnspan=2)
         self.spinbox.grid(row=row, column=column+2)
         self.unit.grid(   row=row, column=column+3, sticky=tkinter.W)
+
+    #the dynamic tone offset sets the value from the packet thread
+    def gui_set(self, val):
+        self.scheduler.mark((self, 'value'), super().gui_set, val)
     
     #this is called when manually altering Tone Offset through GUI
     #we discard the history if user decides to do so
@@ -171,8 +176,10 @@ class GUIRevlimit(Variable):
     BG = {'initial':'#F0F0F0', #the possible background colors of the entry
           'guess':  '#FFFFFF', #'guess' is currently not used
           'curve':  '#CCDDCC'}
-    def __init__(self, root, defaultguivalue='N/A', *args, **kwargs):
+    def __init__(self, root, scheduler, defaultguivalue='N/A', *args, 
+                 **kwargs):
         super().__init__(*args, **kwargs)
+        self.scheduler = scheduler
         self.defaultguivalue = defaultguivalue
         self.tkvar = tkinter.StringVar(value=defaultguivalue)
         
@@ -189,18 +196,23 @@ class GUIRevlimit(Variable):
     def set_bg(self, state):
         self.entry.configure(readonlybackground=self.BG.get(state))
 
+    def gui_set(self, value, bg_state):
+        self.tkvar.set(value)
+        self.set_bg(state=bg_state)
+
     def set(self, value, bg_state='curve'):
         super().set(value)
-        self.tkvar.set(int(value))
-        self.set_bg(state=bg_state)
+        self.scheduler.mark((self, 'value'), self.gui_set, int(value), 
+                            bg_state)
         
     def reset(self):
         super().reset()
-        self.tkvar.set(self.defaultguivalue)
-        self.set_bg(state='initial')
+        self.scheduler.mark((self, 'value'), self.gui_set, 
+                            self.defaultguivalue, 'initial')
 
 class GUIPeakPower():
-    def __init__(self, root, defaultguivalue=''):
+    def __init__(self, root, scheduler, defaultguivalue=''):
+        self.scheduler = scheduler
         self.defaultguivalue = defaultguivalue
         
         self.tkvar = tkinter.StringVar(value=defaultguivalue)
@@ -219,10 +231,11 @@ class GUIPeakPower():
     def set(self, rpm, peakpower):
         # string = f'~{peakpower/10:>4.0f} kW at ~{round_to(rpm, 50):>5} RPM'
         string = f'peak at ~{round_to(rpm, 100):>5} RPM'
-        self.tkvar.set(string)
+        self.scheduler.mark((self, 'value'), self.tkvar.set, string)
         
     def reset(self):
-        self.tkvar.set(self.defaultguivalue)
+        self.scheduler.mark((self, 'value'), self.tkvar.set, 
+                            self.defaultguivalue)
 
 #this class depends on how the volume steps in config are defined
 class GUIVolume():
@@ -258,9 +258,10 @@ class GUIEngineCurve(EngineCurve):
     WIDTH, HEIGHT= 813, 500
     FIGURE_DPI = 72
 
-    def __init__(self, root, handler, config):
+    def __init__(self, root, handler, config, scheduler):
         super().__init__(config)
         self.root = root
+        self.scheduler = scheduler
 
         self.button = tkinter.Button(root, text='View\nPower\nGraph', 
                                      borderwidth=3,
@@ -272,17 +273,24 @@ class GUIEngineCurve(EngineCurve):
         if self.is_loaded():
             self.enable()
 
+    def copy_from(self, curve):
+        super().copy_from(curve)
+        if self.is_loaded():
+            self.enable()
+
     def reset(self):
         super().reset()
         self.disable()
 
     #enable the button in the GUI
     def enable(self):
-        self.button.config(state=tkinter.ACTIVE)
+        self.scheduler.mark((self, 'button'), self.button.config, 
+                            {'state': tkinter.ACTIVE})
 
     #disable the button in the GUI
     def disable(self):
-        self.button.config(state=tkinter.DISABLED)
+        self.scheduler.mark((self, 'button'), self.button.config, 
+                            {'state': tkinter.DISABLED})
 
     def is_disabled(self):
         return self.button.cget('state') == tkinter.DISABLED
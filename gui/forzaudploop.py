@@ -4,9 +4,12 @@ Created on Mon Feb 19 20:46:18 2024
 
 @author: RTB
 """
+from time import perf_counter
+
 from mttkinter import mtTkinter as tkinter
 
 from base.forzaudploop import ForzaUDPLoop
+from gui.latency import LatencyWindow
 
 #TODO: update this class to use ipaddress library
 class GUITargetIP():
@@ -73,13 +76,41 @@ class GUIStatus():
     
     def set(self, value):
         self.tkvar.set(value)
+
+    def bind(self, *args, **kwargs):
+        self.label.bind(*args, **kwargs)
         
+#live packet counters of the loop, refreshed every REFRESH ms
+class GUIPacketStats():
+    REFRESH = 1000 #ms
+
+    def __init__(self, root, packet_stats):
+        self.packet_stats = packet_stats
+        self.tkvar = tkinter.StringVar(value=packet_stats.get_text(0))
+        self.label = tkinter.Label(root, textvariable=self.tkvar, 
+                                   justify=tkinter.LEFT)
+        self.refresh()
+
+    def grid(self, row, column, *args, **kwargs):
+        self.label.grid(row=row, column=column, *args, **kwargs)
+
+    def refresh(self):
+        self.tkvar.set(self.packet_stats.get_text(perf_counter()))
+        self.label.after(self.REFRESH, self.refresh)
+
 class GUIForzaUDPLoop(ForzaUDPLoop):
-    def __init__(self, root, config, loop_func=None):
-        super().__init__(config, loop_func=loop_func)
-        self.state = 'Stopped'
+    def __init__(self, root, config, scheduler, loop_func=None, fields=None, 
+                 latency=None):
+        super().__init__(config, loop_func=loop_func, fields=fields,
+                         latency=latency)
         
+        self.scheduler = scheduler
         self.init_tkinter(root, config)        
+        self.add_listener(self.update_status)
+
+        #if not None, the loop runs in another process: commands are sent
+        #with remote, the state is mirrored through apply_snapshot
+        self.remote = None
 
     def init_tkinter(self, root, config):
         self.frame = tkinter.LabelFrame(root, text='Connection')
@@ -88,10 +119,17 @@ class GUIForzaUDPLoop(ForzaUDPLoop):
                                                   self.startstop_handler)
         self.gui_ip = GUITargetIP(self.frame, config.target_ip)
         self.status = GUIStatus(self.frame, self.state)
+        self.gui_packet_stats = GUIPacketStats(self.frame, self.packet_stats)
         
         # self.gui_ip.grid(         row=0, column=0)
         self.buttonstartstop.grid(row=1, column=0)
         self.status.grid(         row=1, column=1, columnspan=2)
+        self.gui_packet_stats.grid(row=2, column=0, columnspan=3)
+
+        #double click the status to view latency stats
+        if self.latency is not None:
+            self.latencywindow = LatencyWindow(root, self.latency)
+            self.status.bind('<Double-Button-1>', self.latencywindow.open)
     
     def grid(self, row, column, *args, **kwargs):
         self.frame.grid(row=row, column=column, *args, **kwargs)
@@ -107,33 +145,25 @@ class GUIForzaUDPLoop(ForzaUDPLoop):
         # self.set_target_ip(self.gui_ip.get()) #set loop IP before start
         self.toggle(True)
     
-    def update_status(self, value):
-        self.state = value
-        self.status.set(self.state)
-    
-    #same logic as in GTUDPLoop toggle. We seem to be running into a race 
-    #condition where self.isRunning is not updated yet to test for status
-    #update after calling the base function in GTUDPLoop
     def toggle(self, toggle=None):
-        if toggle and not self.isRunning:
-            self.update_status('Started')
-        else:
-            self.update_status('Stopped')
-    
-        super().toggle(toggle)
+        if self.remote is None:
+            return super().toggle(toggle)
+        self.remote(('toggle', toggle))
+        return self.isRunning
+
+    def apply_snapshot(self, state, running, packet_stats):
+        self.isRunning = running
+        self.set_state(state)
+        for name, value in packet_stats.items():
+            setattr(self.packet_stats, name, value)
+
+    #listener of state changes of the loop
+    def update_status(self, value):
+        self.scheduler.mark((self, 'status'), self.status.set, value)
         
     # def send_heartbeat(self):
     #     if self.state in ['Started', 'Timeout']:
     #         self.update_status('Waiting')
             
     #     super().send_heartbeat()
-        
-    def nextFdp(self, server_socket):
-        value = super().nextFdp(server_socket)
-        
-        if value is None and self.state in ['Started', 'Receiving']:
-            self.update_status('Timeout')
-        if value is not None and self.state in ['Started','Waiting','Timeout']:
-            self.update_status('Receiving')
-        
-        return value
+
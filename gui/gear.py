@@ -35,7 +35,8 @@ class GUIGear (Gear):
         ENTRY_COLORS[key] = (dict(zip(['fg', 'readonlybackground'], t1)), 
                              dict(zip(['fg', 'readonlybackground'], t2)))
 
-    def __init__(self, number, root, config):
+    def __init__(self, number, root, config, scheduler):
+        self.scheduler = scheduler #set before reset is called
         super().__init__(number, config)
         self.var_bound = None
         self.shiftrpm_var = tkinter.IntVar()
@@ -75,27 +76,42 @@ class GUIGear (Gear):
     def reset(self):
         super().reset()
         self.var_bound = None
-        self.update_entry_colors()
-        self.variance_entry.grid()
+        self.schedule_state()
+
+    #entries are updated on the next tick of the scheduler
+    def schedule_set(self, name, value):
+        self.scheduler.mark((self, name), getattr(self, f'{name}_var').set,
+                            value)
 
     def set_shiftrpm(self, val):
         super().set_shiftrpm(val)
-        self.shiftrpm_var.set(int(val))
+        self.schedule_set('shiftrpm', int(val))
 
     def set_ratio(self, val):
         super().set_ratio(val)
-        self.ratio_var.set(f'{val:.3f}')
+        self.schedule_set('ratio', f'{val:.3f}')
 
     def set_relratio(self, val):
         super().set_relratio(val)
-        self.relratio_var.set(f'{val:.2f}')
+        self.schedule_set('relratio', f'{val:.2f}')
 
     def set_variance(self, val):
         super().set_variance(val)
         base = self.var_bound if self.var_bound is not None else 1e-4
         factor = math.log(val, base)
         factor = min(max(factor, 0), 1)
-        self.variance_var.set(f'{factor:.0%}')
+        self.schedule_set('variance', f'{factor:.0%}')
+
+    def schedule_state(self):
+        self.scheduler.mark((self, 'state'), self.update_state)
+
+    #colors of the entries and visibility of variance follow the state
+    def update_state(self):
+        self.update_entry_colors()
+        if self.state.at_final():
+            self.variance_entry.grid_remove()
+        else:
+            self.variance_entry.grid()
 
     def update_entry_colors(self):
         shiftrpm_colors, ratio_colors = self.ENTRY_COLORS[self.state]
@@ -106,15 +122,31 @@ class GUIGear (Gear):
 
     def to_next_state(self):
         super().to_next_state()
-        self.update_entry_colors()
-        if self.state.at_final():
-            self.variance_entry.grid_remove()
+        self.schedule_state()
+
+    def newrun_decrease_state(self):
+        super().newrun_decrease_state()
+        self.schedule_state()
 
     def update(self, fdp):
         if self.var_bound is None:
             self.var_bound = self.VAR_BOUNDS[fdp.drivetrain_type]
         return super().update(fdp)
 
+    #mirror the state of a gear in another process, see GUIForzaBeep
+    def apply_snapshot(self, state, ratio, relratio, shiftrpm, variance):
+        if state != self.state.state:
+            self.state.set(state)
+            self.schedule_state()
+        if ratio != self.ratio:
+            self.set_ratio(ratio)
+        if relratio != self.relratio:
+            self.set_relratio(relratio)
+        if shiftrpm != self.shiftrpm:
+            self.set_shiftrpm(shiftrpm)
+        if variance != self.variance:
+            self.set_variance(variance)
+
     def toggle_ratio_display(self):
         if self.ratio_entry.winfo_viewable():
             if self.gear != MAXGEARS:
@@ -127,8 +159,9 @@ class GUIGear (Gear):
 class GUIGears(Gears):
     LABEL_WIDTH = 8
     ROW_COUNT = 3 #for ForzaBeep GUI: how many grid rows a gear takes up
-    def __init__(self, root, config):
-        self.gears = [None] + [GUIGear(g, root, config) for g in self.GEARLIST]
+    def __init__(self, root, config, scheduler):
+        self.gears = [None] + [GUIGear(g, root, config, scheduler) 
+                               for g in self.GEARLIST]
         
         self.init_window(root)
 
@@ -150,6 +183,10 @@ class GUIGears(Gears):
         for i, g in enumerate(self.gears[1:], start=1):
             g.init_grid()
 
+    def apply_snapshot(self, gears):
+        for gear, values in zip(self.gears[1:], gears):
+            gear.apply_snapshot(*values)
+
     def ratio_handler(self, event=None):
         if self.ratio_var.get() == 'Rel. Ratio':
             self.ratio_var.set('Ratio')
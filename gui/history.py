@@ -26,8 +26,11 @@ from base.history import History
 class GUIHistory (History):
     TITLE = "GTShiftTone: Shift history"
     COLUMNNAMES = ['Target', 'Shift RPM', 'Gear', 'Time']
-    def __init__(self, root, config, maxlen=10):
+    def __init__(self, root, config, scheduler, maxlen=10):
         super().__init__(config)
+        self.scheduler = scheduler
+        self.shown = 0 #number of points of history passed to the table
+        self.clear_table = False
         self.rows = deque(maxlen=maxlen)
         self.maxlen = maxlen
         self.init_tkinter(root, config)
@@ -104,7 +107,19 @@ class GUIHistory (History):
     def add_shiftdata(self, point):
         super().add_shiftdata(point)
         
-        self.gui_add_shiftdata(point)
+        self.scheduler.mark((self, 'table'), self.update_table)
+
+    #add points added since the last tick of the scheduler to the table
+    def update_table(self):
+        if self.clear_table:
+            self.clear_table = False
+            blank = dict(zip(self.COLUMNNAMES, ['']*len(self.COLUMNNAMES)))
+            for _ in range(self.maxlen):
+                self.gui_add_shiftdata(blank)
+        new_points = self.history[self.shown:]
+        for point in new_points:
+            self.gui_add_shiftdata(point)
+        self.shown += len(new_points)
         
     def create_window(self):
         if self.window is not None: #force existing window to front
@@ -124,10 +139,9 @@ class GUIHistory (History):
     
     def reset(self):
         super().reset()
-        
-        blank = dict(zip(self.COLUMNNAMES, ['']*len(self.COLUMNNAMES)))
-        for _ in range(self.maxlen):
-            self.gui_add_shiftdata(blank)
+        self.shown = 0
+        self.clear_table = True
+        self.scheduler.mark((self, 'table'), self.update_table)
     
     def close(self):
         self.window.destroy()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:48:33 2026
+
+@author: RTB
+"""
+
+from mttkinter import mtTkinter as tkinter
+
+#class responsible for a tkinter window showing the latency stats of the
+#LatencyProbes. The stats are refreshed every REFRESH ms while it is open.
+class LatencyWindow():
+    TITLE = "ForzaShiftTone: Latency"
+    REFRESH = 1000 #ms
+
+    def __init__(self, root, latency):
+        self.root = root
+        self.latency = latency
+
+        self.window = None
+        self.text = None
+
+    def open(self, event=None):
+        if self.window is not None: #force existing window to front
+            self.window.deiconify()
+            self.window.lift()
+            return
+        self.window = tkinter.Toplevel(self.root)
+        self.window.title(self.TITLE)
+        self.window.protocol('WM_DELETE_WINDOW', self.close)
+
+        self.text = tkinter.Text(self.window, width=72, height=20, 
+                                 font='TkFixedFont')
+        self.text.pack(side=tkinter.TOP, fill=tkinter.BOTH, expand=True)
+        tkinter.Button(self.window, text='Reset', borderwidth=3,
+                       command=self.latency.reset).pack(side=tkinter.BOTTOM)
+        self.refresh()
+
+    def refresh(self):
+        if self.window is None:
+            return
+        self.text.config(state=tkinter.NORMAL)
+        self.text.delete('1.0', tkinter.END)
+        self.text.insert(tkinter.END, self.latency.dump())
+        self.text.config(state=tkinter.DISABLED)
+        self.window.after(self.REFRESH, self.refresh)
+
+    def close(self):
+        self.window.destroy()
+        self.window = None
@@ -19,6 +19,8 @@ PROCESS_PER_MONITOR_DPI_AWARE = 2
 ctypes.windll.shcore.SetProcessDpiAwareness(PROCESS_SYSTEM_DPI_AWARE)
 
 from base.main import ForzaBeep
+from base.enginecurve import EngineCurve
+from base.pipelineprocess import PipelineProcess
 
 #TODO: is there an alternative way to use config?
 from config import config, FILENAME_SETTINGS
@@ -32,6 +34,7 @@ from gui.gear import GUIGears
 from gui.configvar import (GUIPeakPower, GUIToneOffset,
                            GUIRevlimit, GUIVolume, GUIConfigButton)
 from gui.enginecurve import GUIEngineCurve
+from gui.updatescheduler import GUIUpdateScheduler
 
 from utility import Variable
 
@@ -57,9 +60,13 @@ class GUIForzaBeep(ForzaBeep):
                       'window_x', 'window_y', 'dynamictoneoffset',
                       'includereplay', 'window_x', 'window_y']
     
+    SNAPSHOT_POLL_MS = 16 #poll interval of the pipeline process
+    
     def __init__(self):
         super().__init__()
         
+        if self.pipeline_process is not None:
+            self.root.after(self.SNAPSHOT_POLL_MS, self.poll_pipeline)
         self.root.mainloop()
         
     def init_vars(self):
@@ -100,28 +107,46 @@ class GUIForzaBeep(ForzaBeep):
         self.buttonconfig = GUIConfigButton(frame, config, adjustables)
         self.buttonreset = tkinter.Button(frame, text='Reset', borderwidth=3, 
                                           command=self.reset)
-        self.history = GUIHistory(frame, config=config)
+        self.history = GUIHistory(frame, config=config, 
+                                  scheduler=self.scheduler)
         
         self.buttonframe = frame
         
     def init_gui_vars(self):
         root = self.root
-        self.loop = GUIForzaUDPLoop(root, config, loop_func=self.loop_func)
+        #all widgets updated from the packet thread display through this
+        self.scheduler = GUIUpdateScheduler(root, config.gui_update_hz)
+        scheduler = self.scheduler
+        
+        self.loop = GUIForzaUDPLoop(root, config, scheduler, 
+                                    loop_func=self.loop_func,
+                                    fields=self.get_fdp_fields(),
+                                    latency=self.latency)
         
-        self.gears = GUIGears(root, config)
-        self.revlimit = GUIRevlimit(root, defaultvalue=-1)
+        self.gears = GUIGears(root, config, scheduler)
+        self.revlimit = GUIRevlimit(root, scheduler, defaultvalue=-1)
         
-        self.tone_offset = GUIToneOffset(root, config)
+        self.tone_offset = GUIToneOffset(root, config, scheduler)
         
-        self.rpm = GUIRPM(root, hysteresis_percent=self.hysteresis_percent)
+        self.rpm = GUIRPM(root, hysteresis_percent=self.hysteresis_percent,
+                          scheduler=scheduler)
         self.volume = GUIVolume(root, config)
-        self.peakpower = GUIPeakPower(root)
-        self.car_ordinal = GUICarOrdinal(root)
+        self.peakpower = GUIPeakPower(root, scheduler)
+        self.car_ordinal = GUICarOrdinal(root, scheduler)
         
         self.curve = GUIEngineCurve(root, self.buttongraph_handler, 
-                                          config)
+                                          config, scheduler)
         
         self.init_gui_buttonframe()
+        
+        #the packet pipeline runs in a child process, this process only
+        #displays its snapshots and forwards user changes
+        self.pipeline_process = None
+        if config.process_isolation:
+            self.pipeline_process = PipelineProcess()
+            self.loop.remote = self.pipeline_process.send
+            self.synced = {} #last value of each settable var sent or received
+            self.remote_vars = {} #last value of each var in the pipeline
 
     def init_gui_grid_buttonframe(self):
         self.buttonconfig.grid(row=0, column=0)
@@ -154,23 +179,98 @@ class GUIForzaBeep(ForzaBeep):
     def reset(self):
         super().reset()
         self.peakpower.reset()
+        if self.pipeline_process is not None:
+            self.pipeline_process.send(('reset',))
+
+    def poll_pipeline(self):
+        snapshots = self.pipeline_process.poll()
+        #the curve is only sent on change: apply every snapshot
+        for snapshot in snapshots:
+            if 'curve' in snapshot:
+                self.apply_snapshot_curve(snapshot['curve'])
+        if snapshots:
+            self.apply_state(snapshots[-1]['state'])
+        self.sync_variables()
+        self.root.after(self.SNAPSHOT_POLL_MS, self.poll_pipeline)
+
+    def apply_snapshot_curve(self, values):
+        if values is None:
+            self.curve.reset()
+            self.peakpower.reset()
+            return
+        curve = EngineCurve(config)
+        curve.rpm, curve.power, curve.torque, curve.revlimit = values
+        curve.curve_state = True
+        self.curve.copy_from(curve)
+
+    #mirror a ShiftToneState of the pipeline process
+    def apply_state(self, state):
+        self.rpm.schedule_set(state.rpm)
+        self.gears.apply_snapshot(state.gears)
+        
+        if state.revlimit != self.revlimit.get():
+            if state.revlimit == -1:
+                self.revlimit.reset()
+            else:
+                self.revlimit.set(state.revlimit)
+        
+        if state.car_ordinal != self.car_ordinal.get():
+            if state.car_ordinal is None:
+                self.car_ordinal.reset()
+            else:
+                self.car_ordinal.set(state.car_ordinal)
+        
+        if state.peakpower is not None:
+            self.peakpower.set(*state.peakpower)
+        
+        #points added since the previous state, a drop in count is a reset
+        shown = len(self.history.history)
+        if state.history_count < shown:
+            self.history.reset()
+            shown = 0
+        new = min(state.history_count - shown, len(state.history))
+        for point in state.history[len(state.history)-new:]:
+            self.history.add_shiftdata(point)
+        
+        self.loop.apply_snapshot(state.loop_state, state.loop_running,
+                                 dict(state.packet_stats))
+        
+        #only take over changes made by the pipeline itself (dynamic tone
+        #offset): a state may predate a change the user just made
+        for name, value in state.vars:
+            if value == self.remote_vars.get(name):
+                continue
+            self.remote_vars[name] = value
+            if value != self.synced.get(name):
+                getattr(self, name).set(value)
+                self.synced[name] = value
+
+    #forward variables changed in the GUI to the pipeline process
+    def sync_variables(self):
+        for name in self.SETTABLE_VARS:
+            value = getattr(self, name).get()
+            if value != self.synced.get(name):
+                self.pipeline_process.send(('set', name, value))
+                self.synced[name] = value
 
     def buttongraph_handler(self, event=None):
         self.curve.create_window(self.revlimit_percent.get(),
                                  self.car_ordinal.get_name())
 
     #called when car ordinal changes or data collector finishes a run
-    def handle_curve_change(self, gtdp, *args, **kwargs):
-        super().handle_curve_change(gtdp, *args, **kwargs)
+    def apply_curve(self, *args, **kwargs):
+        super().apply_curve(*args, **kwargs)
         if not self.curve.is_loaded():
             return
         
-        self.peakpower.set(*self.curve.get_peakpower_tuple())
+        self.peakpower.set(*self.curve_peakpower)
 
     def close(self):
         #Used to update WIDTH and HEIGHT if necessary
         # print(f'x {self.root.winfo_width()}, y {self.root.winfo_height()}')
         
+        if self.pipeline_process is not None:
+            self.pipeline_process.close()
         self.config_writeback()
         super().close()
         self.root.destroy()
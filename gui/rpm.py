@@ -16,8 +16,9 @@ from base.rpm import RPM
 
 #Consider a defaultguivalue variable
 class GUIRPM(RPM):
-    def __init__(self, root, hysteresis_percent):
+    def __init__(self, root, hysteresis_percent, scheduler):
         super().__init__(hysteresis_percent=hysteresis_percent)
+        self.scheduler = scheduler
         
         self.tkvar = tkinter.IntVar(value=self.defaultvalue)    
         
@@ -25,8 +26,6 @@ class GUIRPM(RPM):
         self.entry = tkinter.Entry(root, width=6, textvariable=self.tkvar,
                                    justify=tkinter.RIGHT, state='readonly')
         self.unit = tkinter.Label(root, text='RPM')
-        
-        self.update_tach = True
     
     #sticky is not forwarded to the grid function
     def grid(self, column, sticky='', *args, **kwargs):
@@ -37,12 +36,14 @@ class GUIRPM(RPM):
     def gui_set(self, value):
         self.tkvar.set(round(value))
         
+    #display value on the next tick of the scheduler
+    def schedule_set(self, value):
+        self.scheduler.mark((self, 'tach'), self.gui_set, value)
+        
     def reset(self):
         super().reset()
-        self.tkvar.set(self.defaultvalue)
+        self.schedule_set(self.defaultvalue)
         
     def update(self, gtdp):
         super().update(gtdp)
-        if self.update_tach:
-            self.gui_set(round(gtdp.current_engine_rpm))
-        self.update_tach = not self.update_tach
\ No newline at end of file
+        self.schedule_set(gtdp.current_engine_rpm)
\ No newline at end of file
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 19:41:05 2026
+
+@author: RTB
+"""
+
+import threading
+
+#Collects GUI updates from any thread and applies them in one batch on the
+#Tk thread, at most hz times per second.
+#Widgets mark a key as dirty together with the function that displays it.
+#Marking a key again before the next tick replaces the pending update: only
+#the newest value of the tach, a gear entry or the status is drawn.
+#Keys are applied in the order they were first marked since the last tick.
+class GUIUpdateScheduler():
+    def __init__(self, root, hz):
+        self.root = root
+        self.interval = max(1, round(1000 / hz)) #ms
+        self.lock = threading.Lock()
+        self.dirty = {}
+        self.tick()
+
+    #key: any hashable, commonly (widget, name)
+    def mark(self, key, func, *args):
+        with self.lock:
+            self.dirty[key] = (func, args)
+
+    def tick(self):
+        with self.lock:
+            dirty, self.dirty = self.dirty, {}
+        for func, args in dirty.values():
+            func(*args)
+        self.root.after(self.interval, self.tick)
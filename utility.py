@@ -41,17 +41,44 @@ def intersection(x1,x2,x3,x4,y1,y2,y3,y4):
             return xs, ys
 
 import itertools as it
+import numpy as np
+
+#vectorised form of intersection for arrays of segment pairs, returns a
+#boolean array. Same arithmetic in the same order, so identical results
+def intersections(x1,x2,x3,x4,y1,y2,y3,y4):
+    d = (x1-x2)*(y3-y4) - (y1-y2)*(x3-x4)
+    nonzero = d != 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xs = ((x1*y2-y1*x2)*(x3-x4) - (x1-x2)*(x3*y4-y3*x4)) / d
+    return (nonzero & 
+            (xs >= np.minimum(x1,x2)) & (xs <= np.maximum(x1,x2)) &
+            (xs >= np.minimum(x3,x4)) & (xs <= np.maximum(x3,x4)))
+
+#For every segment i, find the first segment j in i+2 .. i+max_loop-1 (and
+#below len(x)-2) that intersects it: one vectorised test per distance j-i,
+#from far to near so the nearest intersection is kept. Then walk through the
+#segments with an intersection in order: a loop from i+1 up to and including
+#j is removed and the walk continues from j, as the original nested loops did
 def get_loops(x, y, max_loop=50):
-    ind = list(it.repeat(1, len(x)))
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    n = len(x)
+    ind = np.ones(n, dtype=int)
+    first = np.zeros(n, dtype=np.intp)
+    for distance in range(max_loop-1, 1, -1):
+        if (m := n-2-distance) <= 0:
+            continue
+        i, j = slice(0, m), slice(distance, distance+m)
+        i1, j1 = slice(1, m+1), slice(distance+1, distance+m+1)
+        hits = np.flatnonzero(intersections(x[i],x[i1],x[j],x[j1], 
+                                            y[i],y[i1],y[j],y[j1]))
+        first[hits] = hits + distance
     i = 0
-    while i < len(x) - 2:
-        for j in range(i + 2, min(len(x) - 2, i + max_loop)):
-            if intersection(x[i],x[i+1],x[j],x[j+1], y[i],y[i+1],y[j],y[j+1]):
-                ind[i+1:j+1] = it.repeat(0, j-i)
-                i = j #skip ahead
-                break
-        else:
-            i += 1
+    for k in np.flatnonzero(first).tolist():
+        if k < i:
+            continue
+        j = int(first[k])
+        ind[k+1:j+1] = 0
+        i = j #skip ahead
     return ind
 
 def deloop_and_sort(array, key_x, key_y, key_sort, max_loop=50):
@@ -64,24 +91,6 @@ def round_to(val, n):
 
 
 
-import winsound
-from config import config
-
-def beep(filename=config.sound_file):
-    try:
-        winsound.PlaySound(filename, (winsound.SND_FILENAME | 
-                           winsound.SND_ASYNC | winsound.SND_NODEFAULT))
-    except:
-        print(f"Sound failed to play: {filename}")
-
-from threading import Timer
-def multi_beep(filename=config.sound_file, duration=0.1, count=2, delay=0.1):
-    for number in range(count):
-        t = Timer(number*(duration+delay), lambda: beep(filename))
-        t.start()
-
-
-
 #Only necessary for Forza series
 import math
 #drivetrain enum for fdp
@@ -117,29 +126,64 @@ def derive_gearratio(fdp):
 
 
 
-import intersect
+from base.eventlog import eventlog
 
 #determine shift rpm by finding the intersection point of two power curves:
 # one as is, the other multiplied by the relative ratio of the two consecutive
 # gears. The second is how much longer the next gear is relatively.
-#intersect.intersections gives a tuple where the first value is an array of
-#point on the x-axis where intersection occurs, the second is the y-axis
-#we are only interested in the x-axis and we assume the last intersection is
-#the most accurate one.
-def calculate_shiftrpm(rpm, power, relratio):
-    intersects = intersect.intersection(rpm, power, rpm*relratio, power)[0]
-    shiftrpm = round(intersects[-1],0) if len(intersects) > 0 else rpm[-1]
-    print(f"shift rpm {shiftrpm:.0f}, drop to {shiftrpm/relratio:.0f}, "
-          f"drop is {shiftrpm*(1.0 - 1.0/relratio):.0f}")
+#The curves intersect where power(x) - power(x/relratio) is zero, for x where
+#both are defined: rpm[0]*relratio up to rpm[-1]. Both curves are piecewise
+#linear, so the difference is linear between the union of their breakpoints
+#rpm and rpm*relratio. A sign change between two breakpoints is an exact
+#intersection found by linear interpolation, as is a breakpoint at zero. A
+#run of breakpoints at zero, where the curves overlap such as on a flat top,
+#is a single intersection at the start of the run.
+#We assume the last intersection is the most accurate one. Without any, the
+#shift rpm is the final rpm of the curve.
+#Solves all relratios in one go: returns an array of shift rpms and an array 
+#of the number of intersections per relratio.
+def solve_shiftrpms(rpm, power, relratios):
+    rpm = np.asarray(rpm, dtype=np.float64)
+    power = np.asarray(power, dtype=np.float64)
+    relratios = np.asarray(relratios, dtype=np.float64).reshape(-1, 1)
+
+    x = np.sort(np.concatenate([np.broadcast_to(rpm, (len(relratios), 
+                                                      len(rpm))), 
+                                rpm*relratios], axis=1), axis=1)
+    diff = np.interp(x, rpm, power) - np.interp(x/relratios, rpm, power)
+    diff[(x < rpm[0]*relratios) | (x > rpm[-1])] = np.nan
+
+    #zero at a breakpoint that follows a nonzero one: the start of a run of
+    #zeros. A breakpoint that occurs twice has the same zero twice
+    zeros = diff == 0
+    zeros[:, 1:] &= diff[:, :-1] != 0
+    #sign change between two breakpoints
+    d0, d1, x0, x1 = diff[:, :-1], diff[:, 1:], x[:, :-1], x[:, 1:]
+    changes = d0*d1 < 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossings = x0 - d0*(x1 - x0)/(d1 - d0)
+
+    roots = np.concatenate([np.where(zeros, x, -np.inf),
+                            np.where(changes, crossings, -np.inf)], axis=1)
+    counts = zeros.sum(axis=1) + changes.sum(axis=1)
+    shiftrpms = np.where(counts > 0, np.round(roots.max(axis=1)), rpm[-1])
+    return shiftrpms, counts
+
+def log_shiftrpm(shiftrpm, relratio, count):
+    eventlog.info('shiftrpm', 'shift rpm {shiftrpm:.0f}, drop to {drop_to:.0f}, '
+                  'drop is {drop:.0f}', shiftrpm=shiftrpm, 
+                  drop_to=shiftrpm/relratio, drop=shiftrpm*(1.0 - 1.0/relratio))
+    if count > 1:
+        eventlog.warning('shiftrpm_noisy', 
+                         'multiple intersects found: graph may be noisy')
 
-    if len(intersects) > 1:
-        print("Warning: multiple intersects found: graph may be noisy")
-
-    return shiftrpm
+def calculate_shiftrpm(rpm, power, relratio):
+    shiftrpms, counts = solve_shiftrpms(rpm, power, [relratio])
+    log_shiftrpm(shiftrpms[0], relratio, counts[0])
+    return shiftrpms[0]
 
 
 
-import numpy as np
 from numpy.polynomial import Polynomial
 
 #From: https://stackoverflow.com/questions/20618804/how-to-smooth-a-curve-for-a-dataset